@@ -0,0 +1,235 @@
+"""
+Local stand-in for the fantasy.formula1.com endpoints the dashboard uses.
+
+Responses are synthetic and deterministic (seeded by the request path) unless a recorded
+response exists in the fixtures directory, where a request path such as
+/feeds/limits/constraints.json is looked up as feeds__limits__constraints.json.
+"""
+import os
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from urllib.parse import quote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+CIRCUITS = [
+    "Melbourne", "Shanghai", "Suzuka", "Sakhir", "Jeddah", "Miami", "Imola", "Monaco",
+    "Barcelona", "Montréal", "Spielberg", "Silverstone", "Spa-Francorchamps", "Budapest",
+    "Zandvoort", "Monza", "Baku", "Marina Bay", "Austin", "Mexico City", "São Paulo",
+    "Las Vegas", "Lusail", "Yas Marina",
+]
+
+ASSETS = 30  # 20 drivers + 10 constructors
+CHIPS = ["limitlesstakengd", "is_wildcard_taken_gd_id", "finalfixtakengd", "nonigativetakengd", "extradrstakengd", "autopilottakengd"]
+
+class FakeFantasyAPI:
+    def __init__(self, teams=10, races=24, current_race=None, latency=0.0, fixtures_dir=None, league_id=1234567):
+        self.teams = teams
+        self.races = races
+        self.current_race = current_race or races
+        self.latency = latency
+        self.fixtures_dir = fixtures_dir
+        self.league_id = league_id
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.server = None
+        self._members = {}
+
+    # ================================
+
+    def members(self, league_id=None):
+        # Every tenth team is the previous manager's second team, ranked by points up to the current race.
+        # League N above the base league starts N × half a league later, so neighbouring leagues share half their teams.
+        offset = (int(league_id) - self.league_id) * (self.teams // 2) if league_id else 0
+        with self.lock:
+            if offset not in self._members:
+                entries = []
+                for i in range(offset, offset + self.teams):
+                    second = i % 10 == 9
+                    manager = i - 1 if second else i
+                    teamno = 2 if second else 1
+                    guid = f"{self.uuid(manager)}-0-{100000 + manager}"
+                    entries.append({
+                        "guid": guid,
+                        "teamName": quote(f"Bench Team {i}"),
+                        "teamNo": teamno,
+                        "ovPoints": sum(self.points(guid, teamno, md) for md in range(1, self.current_race + 1)),
+                    })
+                entries.sort(key=lambda entry: entry["ovPoints"], reverse=True)
+                for rank, entry in enumerate(entries, start=1):
+                    entry["rank"] = rank
+                self._members[offset] = entries
+        return self._members[offset]
+
+    def uuid(self, manager):
+        return f"00000000-0000-0000-0000-{manager:012d}"
+
+    def points(self, guid, teamno, matchday):
+        return random.Random(f"{guid}/{teamno}/{matchday}/points").randint(40, 320)
+
+    def team(self, guid, teamno, matchday):
+        if matchday > self.current_race:
+            return {"Data": {"Value": None}}
+
+        rng = random.Random(f"{guid}/{teamno}/{matchday}")
+        budget = 100.0
+        for md in range(1, matchday + 1):
+            budget += random.Random(f"{guid}/{teamno}/{md}/budget").uniform(-0.5, 1.5)
+
+        chips = {}
+        for chip in CHIPS:
+            used = random.Random(f"{guid}/{teamno}/{chip}").randint(1, self.races + 8)
+            chips[chip] = used if used <= matchday else None
+
+        drivers = rng.sample(range(1, 21), 5)
+        constructors = rng.sample(range(21, ASSETS + 1), 2)
+        lineup = [
+            {"id": str(asset), "playerpostion": pos, "iscaptain": int(pos == 1), "ismgcaptain": 0}
+            for pos, asset in enumerate(drivers + constructors, start=1)
+        ]
+        return {"Data": {"Value": {"userTeam": [{
+            "gdpoints": self.points(guid, teamno, matchday),
+            "maxteambal": round(budget, 1),
+            "playerid": lineup,
+            **chips,
+        }]}}}
+
+    def drivers(self):
+        items = []
+        for asset in range(1, ASSETS + 1):
+            rng = random.Random(f"asset/{asset}")
+            items.append({
+                "PlayerId": str(asset),
+                "PositionName": "DRIVER" if asset <= 20 else "CONSTRUCTOR",
+                "IsActive": "1",
+                "FUllName": f"{'Driver' if asset <= 20 else 'Constructor'} {asset}",
+                "TeamName": f"Team {asset % 10}",
+                "Value": str(round(rng.uniform(5, 30), 1)),
+                "OverallPpints": str(rng.randint(0, 400)),
+                "AdditionalStats": {"total_position_pts": float(rng.randint(0, 200)), "overtaking_pts": float(rng.randint(0, 50))},
+            })
+        return {"Data": {"Value": items}}
+
+    def schedule(self):
+        return {"Data": {"Value": [
+            {"MeetingNumber": n, "CircuitLocation": CIRCUITS[(n - 1) % len(CIRCUITS)]} for n in range(1, self.races + 1)
+        ]}}
+
+    def route(self, path):
+        """(endpoint name, JSON body or None for 404) for a request path."""
+        parts = path.strip("/").split("/")
+
+        if "opponentgamedayplayerteamget" in parts:
+            i = parts.index("opponentgamedayplayerteamget")
+            return "opponentgamedayplayerteamget", self.team(parts[i + 2], int(parts[i + 3]), int(parts[i + 4]))
+        if "pvtleagueuserrankget" in parts:
+            i = parts.index("pvtleagueuserrankget")
+            page, size = int(parts[i + 5]), int(parts[i + 6])
+            members = self.members(parts[i + 2])[(page - 1) * size:page * size]
+            return "pvtleagueuserrankget", {"Data": {"Value": {
+                "leagueInfo": {"leagueName": quote("Bench League"), "memberCount": self.teams},
+                "memRank": members,
+            }}}
+        if "getteam" in parts:
+            return "getteam", {"Data": {"Value": {"mdid": self.current_race}}}
+        if path.endswith("/feeds/limits/constraints.json"):
+            return "constraints.json", {"Data": {"Value": {"GamedayId": self.current_race}}}
+        if path.endswith("/feeds/schedule/raceday_en.json"):
+            return "raceday_en.json", self.schedule()
+        if "drivers" in parts and path.endswith("_en.json"):
+            return "drivers/{n}_en.json", self.drivers()
+        return "unknown", None
+
+    # ================================
+
+    def handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if api.latency:
+                    time.sleep(api.latency)
+
+                endpoint, body = api.route(self.path.split("?")[0])
+                recorded = api.recorded(self.path)
+                if recorded is not None:
+                    body = recorded
+
+                with api.lock:
+                    api.counts[endpoint] += 1
+
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                payload = json.dumps(body).encode("utf-8")
+                etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def recorded(self, path):
+        if not self.fixtures_dir:
+            return None
+        fixture = os.path.join(self.fixtures_dir, path.split("?")[0].strip("/").replace("/", "__"))
+        if not os.path.isfile(fixture):
+            return None
+        with open(fixture, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def start(self, host="127.0.0.1", port=0):
+        self.server = ThreadingHTTPServer((host, port), self.handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self.server.server_address[1]}"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def take_counts(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+        return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a stand-in fantasy API")
+    parser.add_argument("--teams", type=int, default=10)
+    parser.add_argument("--races", type=int, default=24)
+    parser.add_argument("--current-race", type=int)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--fixtures", help="Directory of recorded responses")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+
+    api = FakeFantasyAPI(args.teams, args.races, args.current_race, args.latency, args.fixtures)
+    url = api.start(port=args.port)
+    print(f"Serving {args.teams} teams over {args.races} races at {url} (F1_FANTASY_URL={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        api.stop()
@@ -0,0 +1,71 @@
+"""
+Start-up budget check: imports each entry point under `python -X importtime` in a fresh process
+and fails when it takes longer than its budget or pulls in a module that should only load on use.
+
+    python bench/import_budget.py
+    python bench/import_budget.py --runs 5 --scale 2    # slower machine, double every budget
+
+Exits non-zero when any budget is exceeded, so it can gate CI.
+"""
+import os
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# module: (budget in ms, modules it must not import)
+BUDGETS = {
+    "f1_fantasy_dashboard": (400, ["matplotlib", "rich", "PIL", "sqlite3", "configparser"]),
+    "discord_bot": (1200, ["matplotlib", "rich", "PIL", "sqlite3", "configparser"]),
+    "webhook": (500, ["f1_fantasy_dashboard", "matplotlib", "numpy", "PIL"]),
+}
+
+def import_profile(module):
+    """(total import time in ms, names of every module imported) for one fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR, env={**os.environ, "MPLBACKEND": "Agg"}, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+
+    total, imported = None, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        imported.add(name.strip())
+        if name.strip() == module and not name[1:].startswith(" "):
+            total = int(cumulative) / 1000
+    return total, imported
+
+def check(module, budget_ms, forbidden, runs):
+    profiles = [import_profile(module) for _ in range(runs)]
+    best = min(total for total, _ in profiles)
+    loaded = sorted(
+        name for name in forbidden
+        if any(m == name or m.startswith(name + ".") for m in profiles[0][1])
+    )
+    ok = best <= budget_ms and not loaded
+    status = "ok" if ok else "FAIL"
+    print(f"{status:>4}  {module:<22} {best:>8.1f} ms (budget {budget_ms:.0f} ms)"
+          + (f"  imports {', '.join(loaded)} at start-up" if loaded else ""))
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check import-time budgets of the entry points")
+    parser.add_argument("--runs", type=int, default=3, help="Imports per module, the fastest one counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, for slower machines")
+    parser.add_argument("modules", nargs="*", help="Only check these modules")
+    args = parser.parse_args()
+
+    results = [
+        check(module, budget * args.scale, forbidden, args.runs)
+        for module, (budget, forbidden) in BUDGETS.items()
+        if not args.modules or module in args.modules
+    ]
+    sys.exit(0 if all(results) else 1)
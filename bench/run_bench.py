@@ -0,0 +1,144 @@
+"""
+Offline benchmarks for the dashboard and bot renders against the local stand-in API.
+
+    python bench/run_bench.py
+    python bench/run_bench.py --teams 10,100 --races 1,24 --latency 0.02
+
+Each (teams, races) case runs in a fresh subprocess twice: cold (empty cache dir) and warm
+(same cache dir again), reporting wall time per stage, requests per endpoint and peak resident memory. No allocation
+tracing runs alongside, it would slow the timed stages several times over.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BENCH_DIR))
+
+from fake_api import FakeFantasyAPI
+
+RESULT_PREFIX = "BENCH_RESULT "
+
+def timed(stages, name, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    stages[name] = time.perf_counter() - start
+    return result
+
+def run_case(races):
+    """Runs inside the child process, environment already points at the stand-in API."""
+    import io
+    import resource
+
+    sys.path.insert(0, str(REPO_DIR))
+
+    stages = {}
+    start = time.perf_counter()
+    f1fd = timed(stages, "import", __import__, "f1_fantasy_dashboard")
+    bot = timed(stages, "import_bot", __import__, "discord_bot")
+    f1fd.get_console().file = open(os.devnull, "w", encoding="utf-8")
+
+    players = timed(stages, "players", f1fd.fetch_league_players)
+    timed(stages, "league_summary", f1fd.get_league_summary, players, races, last=5)
+
+    def season_png():
+        fig = f1fd.season_summary(players, races, include_all_teams=True, show_plot=False)
+        fig.savefig(io.BytesIO(), format="PNG")
+    timed(stages, "season_summary", season_png)
+
+    league = bot.leagues.for_guild(None)
+    timed(stages, "bot_points", bot.render_table, ("points", league["name"], races, 5), league, f1fd.league_summary_rows, races, metric="Points", last=5)
+    timed(stages, "bot_season", bot.render_chart, ("season", league["name"], races), league, f1fd.season_summary, races, include_all_teams=True)
+    stages["total"] = time.perf_counter() - start
+
+    return {
+        "stages": stages,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,
+    }
+
+def spawn_case(api, url, teams, races, cache_dir, workers):
+    work_dir = Path(cache_dir)
+    env = {
+        **os.environ,
+        "F1_FANTASY_URL": url,
+        "CACHE_DIR": str(work_dir / "cache"),
+        "PLAYER_FILE": str(work_dir / "players.json"),
+        "PLAYER_PATH": str(work_dir / "players.json"),
+        "COOKIE_FILE": str(work_dir / "cookie.json"),
+        "PLAYER_UUID": api.uuid(0),
+        "PLAYER_LEAGUE": str(api.league_id),
+        "LEAGUES_FILE": str(work_dir / "leagues.json"),  # None there, the single league from the variables above
+        "MPLBACKEND": "Agg",
+    }
+    if workers:
+        env["FETCH_WORKERS"] = str(workers)
+
+    api.take_counts()
+    proc = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "--case", "--races", str(races)],
+        cwd=REPO_DIR, env=env, capture_output=True, text=True,
+    )
+    counts = api.take_counts()
+    if proc.returncode != 0:
+        raise RuntimeError(f"Case {teams} teams / {races} races failed:\n{proc.stderr}")
+
+    line = next(l for l in reversed(proc.stdout.splitlines()) if l.startswith(RESULT_PREFIX))
+    result = json.loads(line[len(RESULT_PREFIX):])
+    result["requests"] = dict(counts)
+    return result
+
+def print_results(results):
+    stage_names = ["players", "league_summary", "season_summary", "bot_points", "bot_season", "total"]
+    header = f"{'teams':>6} {'races':>5} {'run':>5} " + " ".join(f"{s:>15}" for s in stage_names) + f" {'requests':>9} {'rss MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        stages = " ".join(f"{r['stages'].get(s, 0):>14.3f}s" for s in stage_names)
+        print(f"{r['teams']:>6} {r['races']:>5} {r['run']:>5} {stages} {sum(r['requests'].values()):>9} {r['max_rss_mb']:>8.1f}")
+
+def parse_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard against a local stand-in API")
+    parser.add_argument("--teams", type=parse_list, default=[10, 100, 1000, 5000], help="Comma-separated league sizes")
+    parser.add_argument("--races", type=parse_list, default=[1, 6, 12, 24], help="Comma-separated race counts")
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds added to every stand-in response")
+    parser.add_argument("--workers", type=int, help="FETCH_WORKERS for the dashboard")
+    parser.add_argument("--fixtures", help="Directory of recorded responses to serve instead of synthetic ones")
+    parser.add_argument("--json", help="Also write the raw results to this file")
+    parser.add_argument("--case", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(RESULT_PREFIX + json.dumps(run_case(args.races[0])))
+        sys.exit(0)
+
+    results = []
+    for teams in args.teams:
+        for races in args.races:
+            api = FakeFantasyAPI(teams=teams, races=races, latency=args.latency, fixtures_dir=args.fixtures)
+            url = api.start()
+            work_dir = tempfile.mkdtemp(prefix="f1bench-")
+            try:
+                for run in ("cold", "warm"):
+                    result = spawn_case(api, url, teams, races, work_dir, args.workers)
+                    result.update(teams=teams, races=races, run=run)
+                    results.append(result)
+                    print(f"{teams} teams / {races} races ({run}): {result['stages']['total']:.2f}s, "
+                          f"{sum(result['requests'].values())} requests", file=sys.stderr)
+            finally:
+                api.stop()
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -1,21 +1,28 @@
 import os
 import io
-import re
-import sys
 import json
-import pathlib
+import time
+import hashlib
+import asyncio
+import threading
+import functools
 import discord
-import matplotlib.pyplot as plt
+import state
+import leagues
+import metrics
 import f1_fantasy_dashboard as f1fd
 from requests.exceptions import JSONDecodeError
-from PIL import Image, ImageDraw, ImageFont
 from discord.ext import commands
 from dotenv import load_dotenv
-from io import StringIO
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 load_dotenv()
 TOKEN = os.getenv("BOT_TOKEN")
 PREFIX = "f1!"
+RENDER_CACHE_BYTES = int(os.getenv("RENDER_CACHE_BYTES", str(32 * 1024 * 1024)))
+TABLE_FONT = "DejaVuSansMono.ttf"
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "4")) # Commands crawled and rendered in parallel
 
 intents = discord.Intents.default()
 intents.message_content = True
@@ -23,60 +30,233 @@ intents.message_content = True
 prefixes = [PREFIX] + [f"<@1415422643091275798> ", f"<@!1415422643091275798> "]
 bot = commands.Bot(command_prefix=prefixes, intents=intents)
 
-async def fetch_players():
-    cache = pathlib.Path(os.getenv("PLAYER_PATH", "players.json"))
-    if cache.is_file() and cache.stat().st_size > 0:
-        return json.loads(cache.read_text(encoding="utf-8"))
+# Loaded once, then swapped in memory when the webhook pushes new players or cookies
+state.configure(cookie_file=os.getenv("COOKIE_PATH"), players_file=os.getenv("PLAYER_PATH"))
 
+def fetch_players(league):
     try:
-        players = f1fd.fetch_league_players()
+        players = f1fd.fetch_league_players(league["players_file"], league=league)
     except JSONDecodeError:
         print("[red]🍪  Session expired – re-harvesting cookies…[/red]")
         f1fd.harvest_f1_cookies(force=True)
-        players = f1fd.fetch_league_players()
-    return players
-
-def strip_ansi_codes(text):
-    ansi_escape = re.compile(r'\x1B[@-_][0-?]*[ -/]*[@-~]')
-    return ansi_escape.sub('', text)
-
-def ascii_table_to_image(table_text, font_path="DejaVuSansMono.ttf", font_size=14, padding=10):
-    lines = table_text.split('\n')
-    font = ImageFont.truetype(font_path, font_size)
-
-    # Calculate image size
-    max_line_width = 0
-    total_height = 0
-    line_heights = []
-
-    for line in lines:
-        bbox = font.getbbox(line)
-        width = bbox[2] - bbox[0]
-        height = bbox[3] - bbox[1]
-        line_heights.append(height)
-        if width > max_line_width:
-            max_line_width = width
-        total_height += height
-
-    img_width = max_line_width + 2 * padding
-    img_height = total_height + 2 * padding
-
-    image = Image.new('RGB', (img_width, img_height), 'white')
+        players = f1fd.fetch_league_players(league["players_file"], league=league)
+    return leagues.cap_teams(players or [], league["max_teams"])
+
+worker_pool = ThreadPoolExecutor(max_workers=BOT_WORKERS, thread_name_prefix="f1-worker")
+
+async def run_blocking(func, *args, **kwargs):
+    # Keep crawls and rendering off the event loop so the gateway stays responsive
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(worker_pool, functools.partial(func, *args, **kwargs))
+
+_in_flight = {}
+
+async def single_flight(key, func, *args, **kwargs):
+    # Callers arriving while `key` is still running await the same result instead of starting their own crawl and render
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(run_blocking(func, *args, **kwargs))
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    # Shielded so one caller's cancellation doesn't cancel the shared work
+    return await asyncio.shield(task)
+
+# PNG bytes keyed by command, arguments and season data version, least recently used evicted past `max_bytes`
+class RenderCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            png = self.entries.get(key)
+            if png is not None:
+                self.entries.move_to_end(key)
+        metrics.inc("f1_cache_requests_total", cache="render", result="hit" if png is not None else "miss")
+        return png
+
+    def put(self, key, png):
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = png
+            self.size += len(png)
+            while self.size > self.max_bytes and self.entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+render_caches = {}
+_render_caches_lock = threading.Lock()
+
+def get_render_cache(league):
+    # One per league so a busy league can't evict everyone else's images
+    with _render_caches_lock:
+        cache = render_caches.get(league["name"])
+        if cache is None:
+            cache = render_caches[league["name"]] = RenderCache(league["render_cache_bytes"] or RENDER_CACHE_BYTES)
+        return cache
+
+async def serve(key, render, *args, **kwargs):
+    # Identical in-flight commands share one render, which itself reuses cached PNGs
+    start = time.perf_counter()
+    try:
+        return await single_flight(key, render, key, *args, **kwargs)
+    finally:
+        metrics.observe("f1_command_seconds", time.perf_counter() - start, command=key[0])
+        # Off the event loop, and off the worker pool so a busy crawl doesn't hold up the reply
+        await asyncio.get_running_loop().run_in_executor(None, flush_metrics)
+
+def flush_metrics():
+    try:
+        # Published for the webhook's /metrics endpoint, which runs in another process
+        metrics.flush("bot")
+    except OSError as e:
+        print(f"Could not write metrics: {e}")
+
+@functools.lru_cache(maxsize=None)
+def get_font(font_size):
+    from PIL import ImageFont
+    return ImageFont.truetype(TABLE_FONT, font_size)
+
+@functools.lru_cache(maxsize=8192)
+def text_width(text, font_size):
+    return get_font(font_size).getlength(text)
+
+def table_to_image(headers, rows, title=None, font_size=14, padding=10, cell_padding=6):
+    # Drawn straight to a PNG: first two columns left-aligned, the rest right-aligned
+    from PIL import Image, ImageDraw
+    font = get_font(font_size)
+    ascent, descent = font.getmetrics()
+    row_height = ascent + descent + 2 * cell_padding
+
+    # Short rows are padded with blank cells, long ones cut to the headers
+    cells = [([str(value) for value in row] + [""] * len(headers))[:len(headers)] for row in rows]
+    widths = [
+        int(max([text_width(header, font_size)] + [text_width(row[i], font_size) for row in cells])) + 2 * cell_padding
+        for i, header in enumerate(headers)
+    ]
+    title_height = row_height if title else 0
+    table_width = sum(widths)
+
+    image = Image.new('RGB', (table_width + 2 * padding, title_height + row_height * (len(cells) + 1) + 2 * padding), 'white')
     draw = ImageDraw.Draw(image)
 
-    y = padding
-    for i, line in enumerate(lines):
-        draw.text((padding, y), line, font=font, fill='black')
-        y += line_heights[i]
+    if title:
+        draw.text((padding + (table_width - text_width(title, font_size)) / 2, padding + cell_padding), title, font=font, fill='black')
+
+    top = padding + title_height
+    draw.rectangle([padding, top, padding + table_width, top + row_height], fill='#e6e6e6')
+
+    for r, row in enumerate([list(headers)] + cells):
+        y = top + r * row_height
+        x = padding
+        for i, text in enumerate(row):
+            if i < 2:
+                text_x = x + cell_padding
+            else:
+                text_x = x + widths[i] - cell_padding - text_width(text, font_size)
+            draw.text((text_x, y + cell_padding), text, font=font, fill='black')
+            x += widths[i]
+
+    # Grid
+    bottom = top + row_height * (len(cells) + 1)
+    for r in range(len(cells) + 2):
+        draw.line([padding, top + r * row_height, padding + table_width, top + r * row_height], fill='#999999')
+    x = padding
+    for width in [0] + widths:
+        x += width
+        draw.line([x, top, x, bottom], fill='#999999')
 
     buf = io.BytesIO()
     image.save(buf, format='PNG')
-    buf.seek(0)
-    return buf
+    return buf.getvalue()
+
+def load_data(league, race_number, days=None, standings=False, leaderboard=False):
+    # From the standings or the season dataset. Leaderboard commands on the current race get no data
+    # and no version, their rows fetch what they show
+    players = fetch_players(league)
+    if leaderboard and race_number == f1fd.get_current_race_number():
+        return players, {"league": league}, None
+    if standings:
+        data = f1fd.get_standings(players, race_number)
+        return players, {"standings": data}, data["version"]
+    season = f1fd.load_season_data(players, race_number, days=days)
+    return players, {"season": season}, f1fd.season_version(season)
+
+def render_table(key, league, rows, race_number, days=None, standings=False, leaderboard=False, **kwargs):
+    with f1fd.request_budget(league["budget"]):
+        return _render_table(key, league, rows, race_number, days, standings, leaderboard, **kwargs)
+
+def _render_table(key, league, rows, race_number, days, standings, leaderboard, **kwargs):
+    with metrics.timer("f1_command_stage_seconds", command=key[0], stage="fetch"):
+        players, data, version = load_data(league, race_number, days, standings, leaderboard)
+
+    table = None
+    if version is None:
+        # The table is all the image depends on, so it versions the cached PNG
+        with metrics.timer("f1_command_stage_seconds", command=key[0], stage="compute"):
+            table = rows(players, race_number, **data, **kwargs)
+        version = hashlib.sha1(json.dumps(table, default=str).encode("utf-8")).hexdigest()
+    cache_key = (key, version)
+
+    render_cache = get_render_cache(league)
+    png = render_cache.get(cache_key)
+    if png is None:
+        if table is None:
+            with metrics.timer("f1_command_stage_seconds", command=key[0], stage="compute"):
+                table = rows(players, race_number, **data, **kwargs)
+        with metrics.timer("f1_command_stage_seconds", command=key[0], stage="render"):
+            png = table_to_image(*table)
+        render_cache.put(cache_key, png)
+    return png
+
+def render_chart(key, league, chart, race_number, standings=False, **kwargs):
+    with f1fd.request_budget(league["budget"]):
+        return _render_chart(key, league, chart, race_number, standings, **kwargs)
+
+def _render_chart(key, league, chart, race_number, standings, **kwargs):
+    with metrics.timer("f1_command_stage_seconds", command=key[0], stage="fetch"):
+        players, data, version = load_data(league, race_number, standings=standings)
+        cache_key = (key, version)
+
+    render_cache = get_render_cache(league)
+    png = render_cache.get(cache_key)
+    if png is None:
+        with metrics.timer("f1_command_stage_seconds", command=key[0], stage="compute"):
+            fig = chart(players, race_number, show_plot=False, **data, **kwargs)
+        with metrics.timer("f1_command_stage_seconds", command=key[0], stage="render"):
+            buf = io.BytesIO()
+            fig.savefig(buf, format='PNG')
+            png = buf.getvalue()
+        render_cache.put(cache_key, png)
+    return png
+
+async def league_for(ctx):
+    # Tells the user when the guild has no league
+    league = leagues.for_guild(ctx.guild.id if ctx.guild else None)
+    if league is None:
+        await ctx.send("This server isn't linked to an F1 Fantasy league.")
+    return league
+
+def budget_note(league):
+    if league["budget"].spent():
+        return f"⚠️ {league['name']} has used its hourly request budget, some races may be missing until it frees up."
+    return None
+
+async def resolve_race_number(race_number):
+    if not race_number:
+        race_number = await run_blocking(f1fd.get_current_race_number)
+    return race_number
+
+def on_state_reload(current):
+    print(f"Reloaded cookies and {len(current['players'])} players")
 
 @bot.event
 async def on_ready():
-    f1fd.harvest_f1_cookies()
+    state.watch(on_state_reload)
+    await run_blocking(f1fd.harvest_f1_cookies)
     print(f"{bot.user} connected to Discord!")
     print(f"Prefixes: {prefixes}")
 
@@ -100,123 +280,88 @@ bot.help_command = Help(
 
 @bot.command(help ="Show budget performance graph over the season")
 async def budget_performance(ctx, race_number: int = None):
-    if race_number is None:
-        race_number = f1fd.get_current_race_number()
+    league = await league_for(ctx)
+    if league is None:
+        return
+    race_number = await resolve_race_number(race_number)
     print(f"Generating budget performance visualization for race {race_number}...")
 
-    players = await bot.loop.run_in_executor(None, fetch_players)
-    fig = f1fd.budget_performance_by_race(players, race_number, show_plot=False)
-    
-    buf = io.BytesIO()
-    fig.savefig(buf, format='PNG')
-    buf.seek(0)
-    plt.close()
-    await ctx.send(file=discord.File(fp=buf, filename=f"budget_performance_{race_number}.png"))
+    png = await serve(("budget_performance", league["name"], race_number), render_chart, league, f1fd.budget_performance_by_race, race_number)
+    await ctx.send(budget_note(league), file=discord.File(fp=io.BytesIO(png), filename=f"budget_performance_{race_number}.png"))
 
-@bot.command(help="Show points for the last N races")
-async def points(ctx, race_number: int = None, last: int = 5):
-    if not race_number:
-        race_number = f1fd.get_current_race_number()
+@bot.command(help="Show points for the last N races, optionally for the top N teams only")
+async def points(ctx, race_number: int = None, last: int = 5, top: int = 0):
+    league = await league_for(ctx)
+    if league is None:
+        return
+    race_number = await resolve_race_number(race_number)
     print(f"Generating points summary for last {last} races...")
 
-    players = await fetch_players()
+    png = await serve(("points", league["name"], race_number, last, top), render_table, league, f1fd.league_summary_rows, race_number, standings=True, leaderboard=True, metric="Points", last=last, top=top)
+    await ctx.send(budget_note(league), file=discord.File(fp=io.BytesIO(png), filename="points.png"))
 
-    output = StringIO()
-    sys.stdout = output
-    f1fd.get_league_summary(players, race_number, metric="Points", last=last)
-    sys.stdout = sys.__stdout__
-    
-    table_text = output.getvalue()
-    print(table_text)
-
-    ascii_text = strip_ansi_codes(table_text)
-    points_table = ascii_table_to_image(ascii_text)
-
-    await ctx.send(file=discord.File(fp=points_table, filename="points.png"))
-
-@bot.command(help="Show budget for the last N races")
-async def budget(ctx, race_number: int = None, last: int = 5):    
-    if not race_number:
-        race_number = f1fd.get_current_race_number()
+@bot.command(help="Show budget for the last N races, optionally for the top N teams only")
+async def budget(ctx, race_number: int = None, last: int = 5, top: int = 0):    
+    league = await league_for(ctx)
+    if league is None:
+        return
+    race_number = await resolve_race_number(race_number)
     print(f"Generating budget summary for last {last} races...")
 
-    players = await fetch_players()
-    
-    output = StringIO()
-    sys.stdout = output
-    f1fd.get_league_summary(players, race_number, metric="Budget", last=last)
-    sys.stdout = sys.__stdout__
-    
-    table_text = output.getvalue()
-    ascii_text = strip_ansi_codes(table_text)
-    budget_table = ascii_table_to_image(ascii_text)
-    await ctx.send(file=discord.File(fp=budget_table, filename="budget.png"))
+    png = await serve(("budget", league["name"], race_number, last, top), render_table, league, f1fd.league_summary_rows, race_number, standings=True, leaderboard=True, metric="Budget", last=last, top=top)
+    await ctx.send(budget_note(league), file=discord.File(fp=io.BytesIO(png), filename="budget.png"))
 
 @bot.command(help="Show team compositions for the race")
 async def teams(ctx, race_number: int = None):
-    if not race_number:
-        race_number = f1fd.get_current_race_number()
+    league = await league_for(ctx)
+    if league is None:
+        return
+    race_number = await resolve_race_number(race_number)
     print(f"Generating team compositions for race {race_number}...")
 
-    players = await fetch_players()
-
-    output = StringIO()
-    sys.stdout = output
-    f1fd.get_team_compositions(players, race_number)
-    sys.stdout = sys.__stdout__
-    
-    table_text = output.getvalue()
-    ascii_text = strip_ansi_codes(table_text)
-    teams_table = ascii_table_to_image(ascii_text)
-    await ctx.send(file=discord.File(fp=teams_table, filename="teams.png"))
+    png = await serve(("teams", league["name"], race_number), render_table, league, f1fd.team_composition_rows, race_number, days=[race_number])
+    await ctx.send(budget_note(league), file=discord.File(fp=io.BytesIO(png), filename="teams.png"))
 
 @bot.command(help="Show points progression over the season")
 async def season(ctx, race_number: int = None):
-    if not race_number:
-        race_number = f1fd.get_current_race_number()
+    league = await league_for(ctx)
+    if league is None:
+        return
+    race_number = await resolve_race_number(race_number)
     print(f"Generating season summary visualization until race {race_number}...")
 
-    players = await fetch_players()
-
-    fig = f1fd.season_summary(players, race_number, include_all_teams=True, show_plot=False)
-    buf = io.BytesIO()
-    fig.savefig(buf, format='PNG')
-    buf.seek(0)
-    plt.close(fig)
-    
-    await ctx.send(file=discord.File(fp=buf, filename=f"season_summary_{race_number}.png"))
+    png = await serve(("season", league["name"], race_number), render_chart, league, f1fd.season_summary, race_number, standings=True, include_all_teams=True)
+    await ctx.send(budget_note(league), file=discord.File(fp=io.BytesIO(png), filename=f"season_summary_{race_number}.png"))
 
 @bot.command(help="Show points gap from leader graph over the season")
 async def gap_points(ctx, race_number: int = None):
-    if not race_number:
-        race_number = f1fd.get_current_race_number()
+    league = await league_for(ctx)
+    if league is None:
+        return
+    race_number = await resolve_race_number(race_number)
     print(f"Generating points gap from leader visualization until race {race_number}...")
 
-    players = await fetch_players()
-
-    fig = f1fd.cumulative_gap_from_leader(players, race_number, show_plot=False)
-    buf = io.BytesIO()
-    fig.savefig(buf, format='PNG')
-    buf.seek(0)
-    plt.close(fig)
-
-    await ctx.send(file=discord.File(fp=buf, filename=f"gap_points_{race_number}.png"))
+    png = await serve(("gap_points", league["name"], race_number), render_chart, league, f1fd.cumulative_gap_from_leader, race_number, standings=True)
+    await ctx.send(budget_note(league), file=discord.File(fp=io.BytesIO(png), filename=f"gap_points_{race_number}.png"))
 
 @bot.command(help="Show budget gap from leader graph over the season")
 async def gap_budget(ctx, race_number: int = None):
-    if not race_number:
-        race_number = f1fd.get_current_race_number()
+    league = await league_for(ctx)
+    if league is None:
+        return
+    race_number = await resolve_race_number(race_number)
     print(f"Generating budget gap from leader visualization until race {race_number}...")
     
-    players = await fetch_players()
-    
-    fig = f1fd.cumulative_gap_from_leader_budget(players, race_number, show_plot=False)
-    buf = io.BytesIO()
-    fig.savefig(buf, format='PNG')
-    buf.seek(0)
-    plt.close(fig)
-    
-    await ctx.send(file=discord.File(fp=buf, filename=f"gap_budget_{race_number}.png"))
+    png = await serve(("gap_budget", league["name"], race_number), render_chart, league, f1fd.cumulative_gap_from_leader_budget, race_number, standings=True)
+    await ctx.send(budget_note(league), file=discord.File(fp=io.BytesIO(png), filename=f"gap_budget_{race_number}.png"))
+
+@bot.command(name="metrics", help="Show request, cache and latency counters (bot owner only)", hidden=True)
+@commands.is_owner()
+async def metrics_report(ctx):
+    report = await run_blocking(metrics.summary) or "No metrics recorded yet."
+    # Discord caps messages at 2000 characters
+    await ctx.send(f"```\n{report[:1900]}\n```")
 
 if __name__ == "__main__":
+    f1fd.init()
     bot.run(TOKEN)
\ No newline at end of file
@@ -1,49 +1,145 @@
 import os
 import sys
 import json
-import sqlite3
+import gzip
+import base64
+import time
+import hashlib
+import argparse
+import threading
 import shutil
-import tempfile
-import configparser
+from concurrent.futures import ThreadPoolExecutor, Future
+from contextlib import contextmanager
 from pathlib import Path
 import requests
-import matplotlib.pyplot as plt
-from rich.console import Console
-from rich.table import Table
+import numpy as np
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import unquote
 from dotenv import load_dotenv
+import state
+import metrics
+import leagues
 
+# matplotlib, rich, sqlite3 and configparser are imported where they're used,
+# so text-only commands and short CLI runs don't pay for them at start-up
 load_dotenv()
-console = Console()
-
-COOKIE_FILE = os.getenv("COOKIE_FILE", "cookie.json")
-PLAYERS_FILE = os.getenv("PLAYER_FILE", "players.json")
-
-try:
-    with open(COOKIE_FILE, "r", encoding="utf-8") as f:
-        cookie_dict = json.load(f).get("Request Cookies", {})
-except (FileNotFoundError, json.JSONDecodeError):
-    cookie_dict = {}    
-
-try:
-    with open(PLAYERS_FILE, "r", encoding="utf-8") as f:
-        players = json.load(f)
-except (json.decoder.JSONDecodeError, FileNotFoundError):
-    players = {}
-
-headers = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
-    "Accept": "application/json",
-    "Referer": "https://fantasy.formula1.com",
-    "Origin": "https://fantasy.formula1.com",
-    "Cookie": "; ".join(f"{k}={v}" for k, v in cookie_dict.items()),
-}
+
+COOKIE_FILE = state.COOKIE_FILE
+PLAYERS_FILE = state.PLAYERS_FILE
+F1_FANTASY_URL = os.getenv("F1_FANTASY_URL", "https://fantasy.formula1.com").rstrip("/") # API base, override to point at a stand-in server
+SNAPSHOT_FILE = os.getenv("SNAPSHOT_FILE") # Serve everything from this season snapshot, no network calls
+CACHE_DIR = Path(os.getenv("CACHE_DIR", ".cache"))
+LIVE_CACHE_TTL = int(os.getenv("LIVE_CACHE_TTL", "300")) # Seconds before the live matchday is re-fetched
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "8"))       # Max concurrent team/matchday requests
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "15"))  # Seconds per HTTP request
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))           # Retries on connection errors and 429/5xx
+FEED_CACHE_TTL = int(os.getenv("FEED_CACHE_TTL", "600"))     # Seconds before schedule/driver feeds are revalidated
+CURRENT_RACE_TTL = int(os.getenv("CURRENT_RACE_TTL", "60"))  # Seconds before constraints.json is revalidated
+SESSION_CHECK_TTL = int(os.getenv("SESSION_CHECK_TTL", "3600")) # Seconds a live session check is trusted for
+LEAGUE_PAGE_SIZE = int(os.getenv("LEAGUE_PAGE_SIZE", "500"))     # League members requested per leaderboard page
+LEAGUE_RESUME_TTL = int(os.getenv("LEAGUE_RESUME_TTL", "3600"))  # Seconds an interrupted league fetch can be resumed
+LEAGUE_FETCH_PASSES = int(os.getenv("LEAGUE_FETCH_PASSES", "2")) # Passes over the leaderboard before settling for a short member list
+CHART_DPI = int(os.getenv("CHART_DPI", "100"))
+FAST_CHART_DPI = int(os.getenv("FAST_CHART_DPI", "72"))
+FAST_CHART_TEAMS = int(os.getenv("FAST_CHART_TEAMS", "12"))  # Charts with more teams render in fast mode
+
+_console = None
+
+def get_console():
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+_session = None
+_session_lock = threading.Lock()
+
+# Counts every retry it grants, by the status (or error) that caused it
+class CountingRetry(Retry):
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        # Only reached when another attempt will actually be made, exhausted retries raise above
+        reason = str(response.status) if response is not None else type(error).__name__ if error else "unknown"
+        metrics.inc("f1_http_retries_total", endpoint=endpoint_name(url or ""), reason=reason)
+        return retry
+
+def endpoint_name(url):
+    # Coarse label, so per-team and per-race URLs share one series
+    path = url.split("?")[0]
+    for name in ("opponentgamedayplayerteamget", "pvtleagueuserrankget", "getteam", "constraints.json", "raceday_en.json"):
+        if name in path:
+            return name
+    if "/feeds/drivers/" in path:
+        return "drivers"
+    return "other"
+
+def get_session():
+    # One keep-alive session, pooled and retrying with exponential backoff
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = CountingRetry(
+                total=HTTP_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({"GET"}),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(10, FETCH_WORKERS), max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+# Raised instead of a request once the active request budget is spent
+class RequestBudgetExceeded(requests.RequestException):
+    pass
+
+_budget = threading.local()
+
+def _set_request_budget(budget):
+    _budget.active = budget
+
+@contextmanager
+def request_budget(budget):
+    # Charge requests made by this thread, and by the fetch pools it starts, to `budget` (anything with `take()`)
+    previous = getattr(_budget, "active", None)
+    _set_request_budget(budget)
+    try:
+        yield budget
+    finally:
+        _set_request_budget(previous)
+
+def http_get(url, headers=None, timeout=REQUEST_TIMEOUT):
+    if _snapshot is not None:
+        raise OfflineError(f"Offline mode, refusing to request {url}")
+
+    budget = getattr(_budget, "active", None)
+    if budget is not None and not budget.take():
+        raise RequestBudgetExceeded(f"Request budget spent, refusing to request {url}")
+
+    endpoint = endpoint_name(url)
+    start = time.perf_counter()
+    try:
+        response = get_session().get(url, headers=headers, timeout=timeout)
+    except requests.RequestException as e:
+        metrics.inc("f1_http_requests_total", endpoint=endpoint, status=type(e).__name__)
+        raise
+    finally:
+        metrics.observe("f1_http_request_seconds", time.perf_counter() - start, endpoint=endpoint)
+    metrics.inc("f1_http_requests_total", endpoint=endpoint, status=response.status_code)
+    return response
 
 def harvest_f1_cookies(force=False):
-    if not force and validate_cookie_session():
+    if _snapshot is not None:
+        return
+    if not force and check_session():
         return
     
-    console.print("[yellow]🍪  Refreshing cookies from Firefox …[/yellow]")
+    get_console().print("[yellow]🍪  Refreshing cookies from Firefox …[/yellow]")
     profile = os.getenv("FIREFOX_PROFILE", "").strip()
 
     if profile:
@@ -54,6 +150,7 @@ def harvest_f1_cookies(force=False):
         ini = Path(os.path.expandvars(r"%APPDATA%\Mozilla\Firefox\profiles.ini"))
         if not ini.exists():
             raise FileNotFoundError("Firefox profiles.ini not found – cannot auto-detect profile")
+        import configparser
         cfg = configparser.ConfigParser()
         cfg.read(ini)
         for sect in cfg.sections():
@@ -64,112 +161,972 @@ def harvest_f1_cookies(force=False):
         else:
             raise RuntimeError("No default profile found in profiles.ini")
 
-    cookie_db = profile_path / "cookies.sqlite"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".sqlite") as tmp:
-        shutil.copy2(cookie_db, tmp.name)
-
-    conn = sqlite3.connect(tmp.name)
-    rows = conn.execute(
-        "SELECT name,value,host,path,expiry,isSecure,isHttpOnly "
-        "FROM moz_cookies WHERE host LIKE '%formula1%'"
-    ).fetchall()
-    conn.close()
-    os.remove(tmp.name)
+    rows = read_firefox_cookies(profile_path / "cookies.sqlite")
 
     WANTED = {"consentUUID", "consentDate", "F1_FANTASY_007", "login-session", "reese84"}
     inner  = {r[0]: r[1] for r in rows if r[0] in WANTED}
 
-    with open(COOKIE_FILE, "w", encoding="utf-8") as f:
-        json.dump({"Request Cookies": inner}, f, indent=2)
+    state.write_json_atomic(state.get()["cookie_file"], {"Request Cookies": inner})
+    state.reload()
 
-    if not validate_cookie_session():
-        console.print("[red]❌  No valid cookies – please log into https://fantasy.formula1.com "
+    if not check_session():
+        get_console().print("[red]❌  No valid cookies – please log into https://fantasy.formula1.com "
                       "in Firefox, then re-run.[/red]")
         sys.exit(1)
 
     return inner
 
 def validate_cookie_session() -> bool:
-    try:
-        jar = json.load(open(COOKIE_FILE, encoding="utf-8"))["Request Cookies"]
-    except Exception:
+    return session_status() is True
+
+def session_status():
+    # True or False when the API gave a definite answer, None when it couldn't tell (5xx, 429, no players yet)
+    current = state.get()
+    if not current["cookies"]:
         return False
     
-    try:
-        with open(PLAYERS_FILE, encoding="utf-8") as f:
-            me = json.load(f)[0]
-            uuid   = me["uuid"]
-    except (FileNotFoundError, IndexError, KeyError):
-        return False
-    url = f"https://fantasy.formula1.com/services/user/gameplay/{uuid}/getteam/1/1/1/1"
+    # The players file stays empty when leagues.json lists the leagues, their player UUIDs work as well
+    # (without the file, the single league's is PLAYER_UUID)
+    uuids = [player.get("uuid") for player in current["players"][:1]] + [league["player_uuid"] for league in leagues.get()]
+    uuid = next((uuid for uuid in uuids if uuid), None)
+    if uuid is None:
+        return None
+    url = f"{F1_FANTASY_URL}/services/user/gameplay/{uuid}/getteam/1/1/1/1"
     
-    r = requests.get(
+    r = http_get(
         url,
         headers={
-            "User-Agent": headers["User-Agent"],
+            "User-Agent": current["headers"]["User-Agent"],
             "Accept": "application/json",
-            "Cookie": "; ".join(f"{k}={v}" for k, v in jar.items())
+            "Cookie": current["headers"]["Cookie"],
         },
         timeout=8
     )
-    return r.status_code == 200 and r.json().get("Data", {}).get("Value", {}).get("mdid") is not None
+    if r.status_code in (401, 403):
+        return False
+    if r.status_code != 200:
+        return None
+    return ((r.json().get("Data") or {}).get("Value") or {}).get("mdid") is not None
+
+def read_firefox_cookies(cookie_db):
+    # Opened read-only rather than copied, as immutable while a running Firefox holds a lock
+    import sqlite3
+    query = (
+        "SELECT name,value,host,path,expiry,isSecure,isHttpOnly "
+        "FROM moz_cookies WHERE host LIKE '%formula1%'"
+    )
+    uri = Path(cookie_db).resolve().as_uri()
+    try:
+        conn = sqlite3.connect(f"{uri}?mode=ro", uri=True)
+        try:
+            return conn.execute(query).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.OperationalError:
+        conn = sqlite3.connect(f"{uri}?mode=ro&immutable=1", uri=True)
+        try:
+            return conn.execute(query).fetchall()
+        finally:
+            conn.close()
+
+def session_expiry(cookies):
+    # Epoch seconds, None when the token can't be read locally
+    token = unquote(cookies.get("F1_FANTASY_007") or "")
+    parts = token.split(".")
+    # A JWT's payload is its middle part, otherwise try the whole value as base64 JSON
+    for part in ([parts[1]] if len(parts) == 3 else []) + [token]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(part + "=" * (-len(part) % 4)))
+        except (ValueError, TypeError):
+            continue
+        if isinstance(payload, dict) and isinstance(payload.get("exp"), (int, float)):
+            return payload["exp"]
+    return None
+
+_session_check = None
+
+def check_session(force=False):
+    # Decided from the token's expiry when possible, else a live check reused for SESSION_CHECK_TTL
+    global _session_check
+    current = state.get()
+    if not current["cookies"]:
+        return False
+
+    expiry = session_expiry(current["cookies"])
+    if expiry is not None and not force:
+        return expiry > time.time() + 60
+
+    cookie_hash = hashlib.sha1(current["headers"]["Cookie"].encode("utf-8")).hexdigest()
+    check_file = CACHE_DIR / "session.json"
+    if _session_check is None:
+        try:
+            _session_check = json.loads(check_file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            _session_check = {}
+
+    if (not force and _session_check.get("cookie_hash") == cookie_hash
+            and time.time() - _session_check.get("checked_at", 0) < SESSION_CHECK_TTL):
+        return _session_check["valid"]
+
+    try:
+        valid = session_status()
+    except (requests.RequestException, ValueError):
+        valid = None
+    if valid is None:
+        return False  # Not a definite answer, so it isn't remembered either
+
+    _session_check = {"cookie_hash": cookie_hash, "valid": valid, "checked_at": time.time()}
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    state.write_json_atomic(check_file, _session_check)
+    return valid
 
 # ================================
 
-def fetch_league_players(save_path=PLAYERS_FILE):
+def league_ids(league=None):
+    # (player UUID, league ID) of a configured league, or from PLAYER_UUID / PLAYER_LEAGUE
+    league = league or {}
+    return league.get("player_uuid") or os.getenv("PLAYER_UUID"), league.get("league_id") or os.getenv("PLAYER_LEAGUE")
+
+_league_fetches = {}  # league_id → lock held while that league's members are fetched
+_league_fetches_lock = threading.Lock()
+
+def _saved_players(save_path):
+    if save_path == state.get()["players_file"]:
+        return state.get()["players"]
     if os.path.exists(save_path) and os.path.getsize(save_path) > 0:
-        with open(save_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return state.read_players(save_path)
+    return None
+
+def fetch_league_players(save_path=None, league=None):
+    if _snapshot is not None:
+        return _snapshot["players"]
 
-    player_uuid = os.getenv("PLAYER_UUID")
-    league_id = os.getenv("PLAYER_LEAGUE")
+    current = state.get()
+    save_path = save_path or current["players_file"]
+    players = _saved_players(save_path)
+    if players:
+        return players
+
+    player_uuid, league_id = league_ids(league)
         
     if not player_uuid or not league_id:
         print(f"Invalid input: {player_uuid}, {league_id}")
         print("Provide a valid player UUID and league ID.")
         return
-        
-    LEAGUE_URL = f"https://fantasy.formula1.com/services/user/leaderboard/{player_uuid}/pvtleagueuserrankget/1/{league_id}/0/1/1/1000000/"
 
-    resp = requests.get(LEAGUE_URL, headers=headers)
+    with _league_fetches_lock:
+        fetch_lock = _league_fetches.setdefault(league_id, threading.Lock())
+    # Commands arriving together on an empty players file share one fetch and one spool
+    with fetch_lock:
+        players = _saved_players(save_path)
+        if players:
+            return players
 
-    data = resp.json()
-    mem_ranks = data["Data"]["Value"]["memRank"]
-    league_name = unquote(data["Data"]["Value"]["leagueInfo"]["leagueName"])
+        spool = _league_spool(league_id)
+        try:
+            league_name = _fetch_league_pages(spool, player_uuid, league_id, current["headers"])
+            count = _write_league_players(spool, save_path)
+        finally:
+            spool.close()
+        try:
+            os.remove(CACHE_DIR / f"league-{league_id}.sqlite")
+        except FileNotFoundError:
+            pass
+
+        print(f"Saved {count} players from {league_name} to {save_path}")
+        if save_path == current["players_file"]:
+            return state.reload()["players"]
+        return state.read_players(save_path)
+
+def _league_spool(league_id):
+    # Checkpoint of a league fetch, resumed when re-run within LEAGUE_RESUME_TTL seconds
+    import sqlite3
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(CACHE_DIR / f"league-{league_id}.sqlite")
+    conn.execute("CREATE TABLE IF NOT EXISTS progress (id INTEGER PRIMARY KEY CHECK (id = 0), page INTEGER NOT NULL, league_name TEXT, updated_at REAL NOT NULL)")
+    conn.execute("CREATE TABLE IF NOT EXISTS managers (uuid TEXT PRIMARY KEY, userid TEXT NOT NULL, first_seq INTEGER NOT NULL)")
+    conn.execute("CREATE TABLE IF NOT EXISTS teams (uuid TEXT NOT NULL, teamno INTEGER NOT NULL, name TEXT NOT NULL, seq INTEGER NOT NULL, PRIMARY KEY (uuid, teamno))")
+
+    row = conn.execute("SELECT updated_at FROM progress").fetchone()
+    if row and time.time() - row[0] > LEAGUE_RESUME_TTL:
+        conn.executescript("DELETE FROM progress; DELETE FROM managers; DELETE FROM teams;")
+    return conn
+
+def _fetch_league_pages(spool, player_uuid, league_id, headers, page_size=LEAGUE_PAGE_SIZE):
+    # Pages after the last stored one, each committed as it arrives
+    row = spool.execute("SELECT page, league_name FROM progress").fetchone()
+    page, league_name = row if row else (0, None)
+    if page:
+        print(f"Resuming league fetch after page {page}")
+    seq = spool.execute("SELECT COUNT(*) FROM teams").fetchone()[0]
+
+    passes = 1
+    while True:
+        page += 1
+        url = f"{F1_FANTASY_URL}/services/user/leaderboard/{player_uuid}/pvtleagueuserrankget/1/{league_id}/0/1/{page}/{page_size}/"
+        data = http_get(url, headers=headers).json()["Data"]["Value"]
+        league_info = data.get("leagueInfo") or {}
+        league_name = league_name or unquote(league_info.get("leagueName", str(league_id)))
+        mem_ranks = data.get("memRank") or []
+
+        for entry in mem_ranks:
+            guid = entry["guid"]  # uuid-0-userid
+            uuid = guid.split("-0-")[0]
+            userid = guid.split("-0-")[-1]
+            spool.execute("INSERT OR IGNORE INTO managers (uuid, userid, first_seq) VALUES (?, ?, ?)", (uuid, userid, seq))
+            # Rankings can shift between pages while a race is live, a team seen twice keeps its first slot
+            spool.execute(
+                "INSERT OR IGNORE INTO teams (uuid, teamno, name, seq) VALUES (?, ?, ?, ?)",
+                (uuid, entry["teamNo"], unquote(entry["teamName"]), seq),
+            )
+            seq += 1
+        spool.execute(
+            "INSERT OR REPLACE INTO progress (id, page, league_name, updated_at) VALUES (0, ?, ?, ?)",
+            (page, league_name, time.time()),
+        )
+        spool.commit()
+
+        member_count = int(league_info.get("memberCount") or 0)
+        if len(mem_ranks) >= page_size and not (member_count and page * page_size >= member_count):
+            continue
+
+        # A team moving up across a page boundary between requests is on neither page, page again to pick it up
+        stored = spool.execute("SELECT COUNT(*) FROM teams").fetchone()[0]
+        if not member_count or stored >= member_count:
+            return league_name
+        if passes >= LEAGUE_FETCH_PASSES:
+            print(f"⚠️ Stored {stored} of {member_count} teams in {league_name}, the rankings kept moving while paging")
+            return league_name
+        print(f"Rankings moved while paging, {member_count - stored} of {member_count} teams were missed. Paging {league_name} again")
+        passes += 1
+        page = 0
+
+def _write_league_players(spool, save_path):
+    # Grouped by manager, in the order they first appeared. Each team keeps its leaderboard position,
+    # which the grouping would otherwise lose
+    from itertools import groupby
+
+    rows = spool.execute(
+        "SELECT m.uuid, m.userid, t.name, t.teamno, ROW_NUMBER() OVER (ORDER BY t.seq) "
+        "FROM managers m JOIN teams t ON t.uuid = m.uuid ORDER BY m.first_seq, t.seq"
+    )
+    count = 0
+    with state.atomic_write(save_path) as f:
+        f.write("[")
+        for (uuid, userid), teams in groupby(rows, key=lambda row: (row[0], row[1])):
+            player = {
+                "uuid": uuid,
+                "userid": userid,
+                "teams": [{"name": name, "teamno": teamno, "position": position} for _, _, name, teamno, position in teams],
+            }
+            f.write(",\n" if count else "\n")
+            f.write("\n".join("  " + line for line in json.dumps(player, indent=2).splitlines()))
+            count += 1
+        f.write("\n]" if count else "]")
+    return count
+
+def _leaderboard_total(entry):
+    for key in ("ovPoints", "ovpoints", "totalPoints", "points"):
+        value = entry.get(key)
+        if value not in (None, ""):
+            try:
+                return int(float(value))
+            except (TypeError, ValueError):
+                pass
+    return None
+
+def fetch_leaderboard(page_size=LEAGUE_PAGE_SIZE, league=None):
+    # {(uuid, teamno): {"total", "rank"}}, None offline, without a league or without totals
+    player_uuid, league_id = league_ids(league)
+    if _snapshot is not None or not player_uuid or not league_id:
+        return None
+
+    leaderboard, page = {}, 0
+    while True:
+        page += 1
+        url = f"{F1_FANTASY_URL}/services/user/leaderboard/{player_uuid}/pvtleagueuserrankget/1/{league_id}/0/1/{page}/{page_size}/"
+        try:
+            data = fetch_with_cache(url, ttl=LIVE_CACHE_TTL)["Data"]["Value"]
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Could not fetch the league leaderboard: {e}")
+            return None
+        mem_ranks = data.get("memRank") or []
+
+        for entry in mem_ranks:
+            total = _leaderboard_total(entry)
+            if total is None:
+                return None
+            rank = entry.get("rank") or entry.get("cur_rank")
+            uuid = entry["guid"].split("-0-")[0]
+            leaderboard.setdefault((uuid, int(entry["teamNo"])), {
+                "total": total,
+                "rank": int(rank) if rank else len(leaderboard) + 1,
+            })
+
+        member_count = (data.get("leagueInfo") or {}).get("memberCount")
+        if len(mem_ranks) < page_size or (member_count and page * page_size >= int(member_count)):
+            return leaderboard or None
 
-    league_players = {}
+def build_player_team_url(uuid, userid, teamno=1, matchday=1):
+    return f"{F1_FANTASY_URL}/services/user/opponentteam/opponentgamedayplayerteamget/1/{uuid}-0-{userid}/{teamno}/{matchday}/1"
 
-    for entry in mem_ranks:
-        guid = entry["guid"]  # uuid-0-userid
-        uuid = guid.split("-0-")[0]
-        userid = guid.split("-0-")[-1]
+# ================================
 
-        team_info = {
-            "name": unquote(entry["teamName"]),
-            "teamno": entry["teamNo"]
+_cache_conn = None
+_cache_lock = threading.Lock()
+_pending = {}  # url → Future of the request in flight
+
+def _cache_db():
+    global _cache_conn
+    if _cache_conn is None:
+        import sqlite3
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _cache_conn = sqlite3.connect(CACHE_DIR / "responses.sqlite", check_same_thread=False)
+        _cache_conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, body TEXT NOT NULL, fetched_at REAL NOT NULL, final INTEGER NOT NULL)"
+        )
+        _cache_conn.execute(
+            "CREATE TABLE IF NOT EXISTS feeds ("
+            "url TEXT PRIMARY KEY, body TEXT NOT NULL, etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL)"
+        )
+    return _cache_conn
+
+def fetch_with_cache(url, headers=None, ttl=None):
+    # ttl=None keeps the response forever, otherwise it's re-fetched after `ttl` seconds
+    if _snapshot is not None:
+        return snapshot_body("responses", url)
+
+    # Leagues sharing a manager ask for the same matchdays, concurrent callers wait on one request.
+    # The lookup and the claim happen under one lock, so a request finishing in between can't be repeated.
+    while True:
+        with _cache_lock:
+            row = _cache_db().execute(
+                "SELECT body, fetched_at, final FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            fresh = row and (row[2] or (ttl is not None and time.time() - row[1] < ttl))
+            pending = None if fresh else _pending.get(url)
+            owner = not fresh and pending is None
+            if owner:
+                pending = _pending[url] = Future()
+
+        if fresh:
+            metrics.inc("f1_cache_requests_total", cache="responses", result="hit")
+            return json.loads(row[0])
+        if owner:
+            break
+
+        metrics.inc("f1_cache_requests_total", cache="responses", result="shared")
+        try:
+            return pending.result()
+        except requests.RequestException:
+            continue  # The owner's failure may be its own (its budget, a timeout), try again
+
+    metrics.inc("f1_cache_requests_total", cache="responses", result="miss")
+    try:
+        response = http_get(url, headers=headers or state.get()["headers"])
+        response.raise_for_status()
+        data = response.json()
+
+        # Don't cache error payloads (e.g. expired session), they would otherwise stick around forever
+        if (data.get("Data") or {}).get("Value"):
+            with _cache_lock:
+                _cache_db().execute(
+                    "INSERT OR REPLACE INTO responses (url, body, fetched_at, final) VALUES (?, ?, ?, ?)",
+                    (url, json.dumps(data), time.time(), int(ttl is None)),
+                )
+                _cache_db().commit()
+        pending.set_result(data)
+    except BaseException as e:
+        pending.set_exception(e)
+        raise
+    finally:
+        with _cache_lock:
+            _pending.pop(url, None)
+
+    return data
+
+_feed_memo = {}
+
+def fetch_feed(url, ttl=FEED_CACHE_TTL):
+    # Revalidated with ETag / If-Modified-Since once older than `ttl` seconds
+    if _snapshot is not None:
+        return snapshot_body("feeds", url)
+
+    entry = _feed_memo.get(url)
+    if entry is None:
+        with _cache_lock:
+            row = _cache_db().execute(
+                "SELECT body, etag, last_modified, fetched_at FROM feeds WHERE url = ?", (url,)
+            ).fetchone()
+        if row:
+            entry = {"data": json.loads(row[0]), "etag": row[1], "last_modified": row[2], "fetched_at": row[3]}
+            _feed_memo[url] = entry
+
+    if entry and time.time() - entry["fetched_at"] < ttl:
+        metrics.inc("f1_cache_requests_total", cache="feeds", result="hit")
+        return entry["data"]
+
+    conditional = {}
+    if entry and entry["etag"]:
+        conditional["If-None-Match"] = entry["etag"]
+    if entry and entry["last_modified"]:
+        conditional["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = http_get(url, headers=conditional or None)
+        if response.status_code == 304 and entry:
+            metrics.inc("f1_cache_requests_total", cache="feeds", result="revalidated")
+            entry = {**entry, "fetched_at": time.time()}
+        else:
+            metrics.inc("f1_cache_requests_total", cache="feeds", result="miss")
+            response.raise_for_status()
+            entry = {
+                "data": response.json(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+            }
+    except requests.RequestException:
+        if entry is None:
+            raise
+        # Serve the stale copy rather than failing the whole report
+        metrics.inc("f1_cache_requests_total", cache="feeds", result="stale")
+        return entry["data"]
+
+    _feed_memo[url] = entry
+    with _cache_lock:
+        _cache_db().execute(
+            "INSERT OR REPLACE INTO feeds (url, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (url, json.dumps(entry["data"]), entry["etag"], entry["last_modified"], entry["fetched_at"]),
+        )
+        _cache_db().commit()
+    return entry["data"]
+
+def fetch_team_matchday(player, team, matchday, current_race=None):
+    # Matchdays before the current one are scored and never change again
+    final = current_race is not None and matchday < current_race
+    url = build_player_team_url(player["uuid"], player["userid"], team["teamno"], matchday=matchday)
+    data = fetch_with_cache(url, ttl=None if final else LIVE_CACHE_TTL)
+    return data["Data"]["Value"]["userTeam"][0]
+
+# ================================
+
+_snapshot = None
+
+# Raised instead of a request while a snapshot is loaded, or when the snapshot lacks a URL
+class OfflineError(requests.RequestException):
+    pass
+
+def _snapshot_key(url):
+    # Stored relative to the API base so a snapshot works whichever server it was recorded from
+    return url[len(F1_FANTASY_URL):] if url.startswith(F1_FANTASY_URL) else url
+
+def snapshot_body(kind, url):
+    body = _snapshot[kind].get(_snapshot_key(url))
+    if body is None:
+        raise OfflineError(f"{_snapshot_key(url)} is not in the snapshot")
+    return body
+
+def export_snapshot(path, players, race_number=None, max_workers=FETCH_WORKERS):
+    # Players, team/matchday responses and feeds up to `race_number`, as gzipped JSON
+    current_race = get_current_race_number()
+    if current_race is None:
+        # Without it there's no telling which matchdays are scored, or how many to export
+        print("⚠️ Could not determine the current race, snapshot not exported.")
+        return None
+    race_number = race_number or current_race
+
+    feeds = {}
+    feed_urls = [
+        f"{F1_FANTASY_URL}/feeds/limits/constraints.json",
+        f"{F1_FANTASY_URL}/feeds/schedule/raceday_en.json",
+    ] + [f"{F1_FANTASY_URL}/feeds/drivers/{d}_en.json" for d in range(1, race_number + 1)]
+    for url in feed_urls:
+        try:
+            feeds[_snapshot_key(url)] = fetch_feed(url, ttl=CURRENT_RACE_TTL if "constraints" in url else FEED_CACHE_TTL)
+        except requests.RequestException as e:
+            print(f"⚠️ Skipping {url}: {e}")
+
+    def fetch(url, final):
+        try:
+            return url, fetch_with_cache(url, ttl=None if final else LIVE_CACHE_TTL)
+        except Exception as e:
+            print(f"⚠️ Skipping {url}: {e}")
+            return url, None
+
+    jobs = [
+        (build_player_team_url(player["uuid"], player["userid"], team["teamno"], matchday=d), d < current_race)
+        for player in players
+        for team in player["teams"]
+        for d in range(1, race_number + 1)
+    ]
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        fetched = list(pool.map(lambda job: fetch(*job), jobs))
+
+    snapshot = {
+        "version": 1,
+        "created_at": time.time(),
+        "race_number": race_number,
+        "players": players,
+        "feeds": feeds,
+        "responses": {_snapshot_key(url): body for url, body in fetched if body is not None},
+    }
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+
+    print(f"Saved snapshot of {len(players)} players, {len(snapshot['responses'])} team responses and {len(feeds)} feeds to {path}")
+    return path
+
+def load_snapshot(path):
+    # Offline mode: every fetch is served from the snapshot, requests raise OfflineError
+    global _snapshot
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    _feed_memo.clear()
+    _snapshot = snapshot
+    return snapshot
+
+def init():
+    # Offline mode when SNAPSHOT_FILE is set
+    if SNAPSHOT_FILE and _snapshot is None:
+        load_snapshot(SNAPSHOT_FILE)
+
+CHIP_MAPPING = {
+    "limitlesstakengd": "LL",
+    "is_wildcard_taken_gd_id": "WC",
+    "finalfixtakengd": "FF",
+    "nonigativetakengd": "NN",
+    "extradrstakengd": "3x",
+    "autopilottakengd": "AP"
+}
+
+def summarize_team_matchday(team_data):
+    # Only the fields the reports use
+    try:
+        points = int(team_data["gdpoints"])
+    except (KeyError, TypeError, ValueError):
+        points = None
+
+    budget = (
+        team_data.get("maxteambal") or
+        team_data.get("maxTeambal") or
+        (team_data.get("team_info") or {}).get("maxTeambal")
+    )
+
+    lineup = [
+        {
+            "id": int(entry["id"]),
+            "playerpostion": entry["playerpostion"],
+            "iscaptain": entry.get("iscaptain", 0),
+            "ismgcaptain": entry.get("ismgcaptain", 0),
         }
+        for entry in team_data.get("playerid") or []
+    ]
+
+    return {
+        "points": points,
+        "budget": float(budget) if budget else None,
+        "chips": {key: team_data.get(key) for key in CHIP_MAPPING},
+        "lineup": lineup,
+    }
 
-        if uuid not in league_players:
-            league_players[uuid] = {"uuid": uuid, "userid": userid, "teams": []}
+def _fetch_team_summary(player, team, matchday, current_race):
+    try:
+        return summarize_team_matchday(fetch_team_matchday(player, team, matchday, current_race))
+    except Exception:
+        return None
 
-        league_players[uuid]["teams"].append(team_info)
+# ================================
+# Team history: one .npy column per field, teams × matchdays, memory-mapped on load.
+# Each save writes a new generation directory and then points CURRENT at it, so readers never see a half-written store.
+
+HISTORY_DIR = CACHE_DIR / "history"
+LINEUP_SLOTS = 7  # 5 drivers + 2 constructors
+NO_CHIP = -1
+
+HISTORY_COLUMNS = {
+    # name: (dtype, trailing shape, missing value)
+    "points": (np.float32, (), np.nan),
+    "budget": (np.float32, (), np.nan),
+    "chips": (np.int16, (len(CHIP_MAPPING),), NO_CHIP),    # matchday each chip was played, as reported on that matchday
+    "lineup": (np.int32, (LINEUP_SLOTS,), 0),              # asset ids ordered by position, 0 = empty slot
+    "positions": (np.int8, (LINEUP_SLOTS,), 0),
+    "captains": (np.int8, (LINEUP_SLOTS,), 0),             # bit 0 = captain, bit 1 = mega captain
+    "fetched_at": (np.float64, (), 0.0),                   # 0 = matchday not stored
+    "final": (np.bool_, (), False),
+}
 
-    players_list = list(league_players.values())
+_history = None
+_history_lock = threading.RLock()
 
-    with open(save_path, "w", encoding="utf-8") as f:
-        json.dump(players_list, f, indent=2, separators=(',', ': '))
+def _empty_history_column(name, teams, matchdays):
+    dtype, shape, missing = HISTORY_COLUMNS[name]
+    return np.full((teams, matchdays) + shape, missing, dtype=dtype)
 
-    print(f"Saved {len(players_list)} players from {league_name} to {save_path}")
-    return players_list
+def open_team_history():
+    # Read-only memory maps of the current generation
+    global _history
+    try:
+        generation = (HISTORY_DIR / "CURRENT").read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        generation = None
 
-def build_player_team_url(uuid, userid, teamno=1, matchday=1):
-    return f"https://fantasy.formula1.com/services/user/opponentteam/opponentgamedayplayerteamget/1/{uuid}-0-{userid}/{teamno}/{matchday}/1"
-    
-    # data = fetch_with_cache(
-    #     f"https://fantasy.formula1.com/services/user/opponentteam/opponentgamedayplayerteamget/1/{uuid}-0-{userid}/{teamno}/{matchday}/1")
-    # return data
+    with _history_lock:
+        if _history is not None and _history["generation"] == generation:
+            return _history
+
+        history = {"generation": generation, "teams": []}
+        try:
+            if generation:
+                path = HISTORY_DIR / generation
+                history["teams"] = [tuple(team) for team in json.loads((path / "teams.json").read_text(encoding="utf-8"))]
+                for name in HISTORY_COLUMNS:
+                    history[name] = np.load(path / f"{name}.npy", mmap_mode="r")
+        except (FileNotFoundError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable team history {generation}: {e}")
+            history = {"generation": generation, "teams": []}
+        if not history["teams"]:
+            history.update({name: _empty_history_column(name, 0, 0) for name in HISTORY_COLUMNS})
+
+        history["index"] = {team: i for i, team in enumerate(history["teams"])}
+        _history = history
+        return history
+
+def _history_summary(history, i, j):
+    points = history["points"][i, j]
+    budget = history["budget"][i, j]
+    lineup = [
+        {"id": int(asset), "playerpostion": int(position), "iscaptain": int(flags & 1), "ismgcaptain": int(flags >> 1 & 1)}
+        for asset, position, flags in zip(history["lineup"][i, j], history["positions"][i, j], history["captains"][i, j])
+        if asset
+    ]
+    return {
+        "points": None if np.isnan(points) else int(points),
+        # float32 keeps ~7 significant digits, budgets only ever have one decimal
+        "budget": None if np.isnan(budget) else round(float(budget), 2),
+        "chips": {key: None if value == NO_CHIP else int(value) for key, value in zip(CHIP_MAPPING, history["chips"][i, j])},
+        "lineup": lineup,
+    }
+
+def load_team_history(days, history=None):
+    # Keyed by (uuid, teamno, matchday), live matchdays only within LIVE_CACHE_TTL
+    history = history if history is not None else open_team_history()
+    matchdays = history["points"].shape[1]
+    days = [d for d in days if 1 <= d <= matchdays]
+    if not days or not history["teams"]:
+        return {}
+
+    cols = np.array(days) - 1
+    fetched_at = history["fetched_at"][:, cols]
+    usable = (fetched_at > 0) & (history["final"][:, cols] | (fetched_at > time.time() - LIVE_CACHE_TTL))
+
+    rows, positions = np.nonzero(usable)
+    return {
+        history["teams"][i] + (days[k],): _history_summary(history, i, cols[k])
+        for i, k in zip(rows.tolist(), positions.tolist())
+    }
+
+def _chip_value(value):
+    return int(value) if isinstance(value, (int, float, str)) and str(value).isdigit() else NO_CHIP
+
+def store_team_history(records, current_race=None):
+    # Returns the fetched_at stamp of the stored records, None when there was nothing to store
+    records = [(entry, d, summary) for entry, d, summary in records if summary is not None]
+    if not records:
+        return None
+
+    now = time.time()
+    with _history_lock:
+        history = open_team_history()
+        teams = list(history["teams"])
+        index = dict(history["index"])
+        for entry, _, _ in records:
+            key = (entry["uuid"], entry["teamno"])
+            if key not in index:
+                index[key] = len(teams)
+                teams.append(key)
+
+        matchdays = max([history["points"].shape[1]] + [d for _, d, _ in records])
+        columns = {}
+        for name in HISTORY_COLUMNS:
+            column = _empty_history_column(name, len(teams), matchdays)
+            old = history[name]
+            column[:old.shape[0], :old.shape[1]] = old
+            columns[name] = column
+
+        for entry, d, summary in records:
+            i, j = index[(entry["uuid"], entry["teamno"])], d - 1
+            lineup = sorted(summary["lineup"], key=lambda x: x["playerpostion"])[:LINEUP_SLOTS]
+
+            columns["points"][i, j] = np.nan if summary["points"] is None else summary["points"]
+            columns["budget"][i, j] = np.nan if summary["budget"] is None else summary["budget"]
+            columns["chips"][i, j] = [_chip_value(summary["chips"].get(key)) for key in CHIP_MAPPING]
+            columns["lineup"][i, j] = 0
+            columns["positions"][i, j] = 0
+            columns["captains"][i, j] = 0
+            for slot, asset in enumerate(lineup):
+                columns["lineup"][i, j, slot] = asset["id"]
+                columns["positions"][i, j, slot] = asset["playerpostion"]
+                columns["captains"][i, j, slot] = (1 if asset["iscaptain"] else 0) | (2 if asset["ismgcaptain"] else 0)
+            columns["fetched_at"][i, j] = now
+            columns["final"][i, j] = current_race is not None and d < current_race
+
+        _save_team_history(teams, columns)
+    return now
+
+def _save_team_history(teams, columns):
+    generation = f"{time.time_ns():x}"
+    path = HISTORY_DIR / generation
+    path.mkdir(parents=True)
+    (path / "teams.json").write_text(json.dumps(teams), encoding="utf-8")
+    for name, column in columns.items():
+        np.save(path / f"{name}.npy", column)
+
+    with state.atomic_write(HISTORY_DIR / "CURRENT") as f:
+        f.write(generation)
+
+    # Older generations may still be mapped by another process, where they can't be removed yet
+    for old in HISTORY_DIR.iterdir():
+        if old.is_dir() and old.name != generation:
+            shutil.rmtree(old, ignore_errors=True)
+
+# Season dataset, with the version it was loaded at when that could be read off the history stamps
+class Season(list):
+    version = None
+
+def load_season_data(players, race_number, days=None, max_workers=FETCH_WORKERS, incremental=True):
+    # Every (team, matchday) fetched once, reusing the stored history when `incremental`
+    days = list(days) if days is not None else list(range(1, race_number + 1))
+    current_race = get_current_race_number()
+    # A snapshot is the whole truth in offline mode, the local history must not leak into it
+    incremental = incremental and _snapshot is None
+    stored_history = open_team_history() if incremental else None
+    history = load_team_history(days, stored_history) if incremental else {}
+
+    season, jobs, fetched, stored_at = Season(), [], [], None
+    for player in players:
+        for team in player["teams"]:
+            entry = {
+                "name": team["name"],
+                "uuid": player["uuid"],
+                "userid": player["userid"],
+                "teamno": team["teamno"],
+                "races": {},
+            }
+            season.append(entry)
+            for d in days:
+                stored = history.get((player["uuid"], team["teamno"], d))
+                if stored is not None:
+                    entry["races"][d] = stored
+                else:
+                    jobs.append((entry, player, team, d))
+
+    metrics.inc("f1_cache_requests_total", len(season) * len(days) - len(jobs), cache="team_history", result="hit")
+    metrics.inc("f1_cache_requests_total", len(jobs), cache="team_history", result="miss")
+
+    if jobs:
+        # Workers charge their requests to the caller's budget
+        budget = getattr(_budget, "active", None)
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), initializer=_set_request_budget, initargs=(budget,)) as pool:
+            futures = [
+                (entry, d, pool.submit(_fetch_team_summary, player, team, d, current_race))
+                for entry, player, team, d in jobs
+            ]
+            fetched = [(entry, d, future.result()) for entry, d, future in futures]
+
+        for entry, d, summary in fetched:
+            entry["races"][d] = summary
+        if incremental:
+            stored_at = store_team_history(fetched, current_race)
+
+    # Keep each team's matchdays in race order regardless of where they came from
+    for entry in season:
+        entry["races"] = {d: entry["races"][d] for d in days}
+
+    if incremental:
+        season.version = _history_version(season, days, stored_history, fetched, stored_at)
+    return season
+
+def _history_version(season, days, history, fetched, stored_at):
+    # Stored matchdays never change in place, so the teams plus each matchday's fetched_at stamp pin the data
+    stamps = np.zeros((len(season), len(days)))
+    rows = np.array([history["index"].get((entry["uuid"], entry["teamno"]), -1) for entry in season], dtype=np.int64)
+    cols = np.array(days, dtype=np.int64) - 1
+    known = rows >= 0
+    in_store = (cols >= 0) & (cols < history["fetched_at"].shape[1])
+    if known.any() and in_store.any():
+        stamps[np.ix_(known, in_store)] = history["fetched_at"][np.ix_(rows[known], cols[in_store])]
+
+    # Everything that wasn't usable from the history was fetched, a failed fetch leaves the matchday missing
+    positions = {id(entry): i for i, entry in enumerate(season)}
+    columns = {d: j for j, d in enumerate(days)}
+    for entry, d, summary in fetched:
+        stamps[positions[id(entry)], columns[d]] = stored_at if summary is not None else 0
+
+    teams = [(entry["uuid"], entry["userid"], entry["teamno"], entry["name"]) for entry in season]
+    digest = hashlib.sha1(json.dumps([teams, days]).encode("utf-8"))
+    digest.update(stamps.tobytes())
+    return digest.hexdigest()
+
+def season_version(season):
+    # Changes whenever any team's matchday data does. Read off the history stamps when the season was loaded from it,
+    # otherwise hashed from the whole dataset
+    if getattr(season, "version", None):
+        return season.version
+    payload = json.dumps(season, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def season_matrix(season, metric, race_days):
+    # Teams × races, NaN where the matchday is missing
+    race_days = list(race_days)
+    values = np.full((len(season), len(race_days)), np.nan)
+    for i, team in enumerate(season):
+        for j, r in enumerate(race_days):
+            day = team["races"].get(r)
+            if day and day[metric] is not None:
+                values[i, j] = day[metric]
+    return values
+
+def cumulative_points(points):
+    # Missing matchdays score nothing
+    return np.nancumsum(points, axis=1)
+
+def forward_fill(values, fill=0.0):
+    # Carry the previous value forward over missing matchdays, `fill` before the first known one
+    missing = np.isnan(values)
+    last_known = np.where(missing, -1, np.arange(values.shape[1]))
+    np.maximum.accumulate(last_known, axis=1, out=last_known)
+    filled = np.take_along_axis(values, np.maximum(last_known, 0), axis=1)
+    filled[last_known < 0] = fill
+    return filled
+
+def gap_from_leader(values):
+    return values - values.max(axis=0, initial=-np.inf)
+
+def race_deltas(values, start=0.0):
+    return np.diff(values, axis=1, prepend=start)
+
+def race_ranks(values):
+    # 1 = best; ties share the better rank. Sorted per race, so large leagues stay O(teams log teams)
+    ranks = np.empty(values.shape, dtype=np.int32)
+    for j in range(values.shape[1]):
+        ordered = np.sort(values[:, j])
+        ranks[:, j] = len(ordered) - np.searchsorted(ordered, values[:, j], side="right") + 1
+    return ranks
+
+# ================================
+# Standings: everything the tables and gap charts read, computed once per season version.
+# Once every matchday in them is scored they never change, so they're kept on disk and reused without a crawl.
+
+STANDINGS_DIR = CACHE_DIR / "standings"
+
+_standings = {}
+_standings_lock = threading.Lock()
+_standings_builds = {}  # key → lock held while that table is built and saved
+
+def standings_key(players, race_number):
+    teams = [(player["uuid"], team["teamno"], team["name"]) for player in players for team in player["teams"]]
+    return f"{race_number}-{hashlib.sha1(json.dumps(teams).encode('utf-8')).hexdigest()[:16]}"
 
-def get_league_summary(players, race_number, metric="Points", LL_DELTA=None, *, first=0, last=0, top=0):   
+def build_standings(season, race_number, version=None):
+    # Per team and race, teams stay in season order
+    race_days = range(1, race_number + 1)
+    points = season_matrix(season, "points", race_days)
+    budget = season_matrix(season, "budget", race_days)
+    cumulative = cumulative_points(points)
+
+    chips = []
+    for team in season:
+        latest = team["races"].get(race_number)
+        chips.append(parse_chips(latest["chips"], race_number, cumulative=True) if latest else "–")
+
+    return {
+        "race_number": race_number,
+        "version": version or season_version(season),
+        "teams": [{"name": team["name"], "uuid": team["uuid"], "teamno": team["teamno"]} for team in season],
+        "points": points,
+        "budget": budget,
+        "cumulative": cumulative,
+        "rank": race_ranks(cumulative),
+        "gap": gap_from_leader(cumulative),
+        "budget_gap": gap_from_leader(forward_fill(budget)).round(2),
+        "chips": chips,
+        "used_ll": np.array(["LL" in c for c in chips], dtype=bool),
+    }
+
+STANDINGS_ARRAYS = ("points", "budget", "cumulative", "rank", "gap", "budget_gap", "used_ll")
+
+def save_standings(standings, key):
+    STANDINGS_DIR.mkdir(parents=True, exist_ok=True)
+    meta = {k: standings[k] for k in ("race_number", "version", "teams", "chips")}
+    with state.atomic_write(STANDINGS_DIR / f"{key}.npz", "wb") as f:
+        np.savez(f, meta=np.array(json.dumps(meta)), **{k: standings[k] for k in STANDINGS_ARRAYS})
+
+def load_standings(key):
+    try:
+        with np.load(STANDINGS_DIR / f"{key}.npz", allow_pickle=False) as data:
+            standings = json.loads(str(data["meta"]))
+            standings.update({k: data[k] for k in STANDINGS_ARRAYS})
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+    standings["final"] = True
+    return standings
+
+def get_standings(players, race_number, season=None):
+    # Scored races come from memory or disk, the rest are rebuilt when the season version changes
+    key = standings_key(players, race_number)
+    with _standings_lock:
+        cached = _standings.get(key)
+        build_lock = _standings_builds.setdefault(key, threading.Lock())
+    if cached is not None and cached["final"]:
+        return cached
+
+    # Commands asking for the same table at once wait for one build instead of racing to save it
+    with build_lock:
+        with _standings_lock:
+            cached = _standings.get(key)
+        if cached is not None and cached["final"]:
+            return cached
+
+        # A snapshot is the whole truth in offline mode, stored standings must not leak into it or be replaced by it
+        offline = _snapshot is not None
+        if season is None:
+            stored = None if offline else load_standings(key)
+            if stored is not None:
+                with _standings_lock:
+                    _standings[key] = stored
+                return stored
+            season = load_season_data(players, race_number)
+
+        version = season_version(season)
+        if cached is not None and cached["version"] == version:
+            return cached
+
+        standings = build_standings(season, race_number, version)
+        current_race = get_current_race_number()
+        # Only persist when every matchday is scored and was actually fetched, a gap would otherwise stick forever
+        complete = all(day is not None for team in season for day in team["races"].values())
+        standings["final"] = current_race is not None and race_number < current_race and complete
+        if standings["final"] and not offline:
+            save_standings(standings, key)
+
+        with _standings_lock:
+            _standings[key] = standings
+        return standings
+
+def select_standings(standings, include_all_teams=True):
+    # Row indices of the teams to show, T2 and T3s only when including all teams
+    return [i for i, team in enumerate(standings["teams"]) if include_all_teams or team["teamno"] == 1]
+
+def get_league_summary(players, race_number, metric="Points", LL_DELTA=None, *, first=0, last=0, top=0, season=None, standings=None, league=None):
+    summary = league_summary_rows(players, race_number, metric, LL_DELTA, first=first, last=last, top=top, season=season, standings=standings, league=league)
+    if summary is None:
+        return
+    return print_rich_table(*summary)
+
+def league_summary_rows(players, race_number, metric="Points", LL_DELTA=None, *, first=0, last=0, top=0, season=None, standings=None, league=None):
+    # Current race totals come from the leaderboard when no season or standings are given
     if metric == "Points":
         all_days = list(range(1, race_number + 1))
     elif metric == "Budget":
@@ -178,7 +1135,7 @@ def get_league_summary(players, race_number, metric="Points", LL_DELTA=None, *,
         print("Invalid metric. Use 'Points' or 'Budget'.")
         return
 
-    metric_key = "gdpoints" if metric == "Points" else "maxteambal"
+    metric_key = "points" if metric == "Points" else "budget"
     location_map = extract_race_locations()
 
     # Decide which races to show
@@ -192,64 +1149,19 @@ def get_league_summary(players, race_number, metric="Points", LL_DELTA=None, *,
     else:
         days = all_days
 
-    rows, full_totals = [], []
-    for player in players:
-        for team in player["teams"]:
-            chips = "–"
-            used_LL = False
-
-            # Fetch latest available team data for chip summary
-            latest_url = build_player_team_url(player["uuid"], player["userid"], team["teamno"], matchday=race_number)
-            latest_response = requests.get(latest_url, headers=headers)
-
-            if latest_response.status_code == 200:
-                try:
-                    latest_team_data = latest_response.json()['Data']['Value']['userTeam'][0]
-                    chips = parse_chips(latest_team_data, race_number, cumulative=True)
-                    used_LL = "LL" in chips
-                except Exception:
-                    # chips = "⚠️"
-                    pass
-
-            race_vals = []
-            for d in days:
-                url = build_player_team_url(player["uuid"], player["userid"], team["teamno"], matchday=d)
-                response = requests.get(url, headers=headers)
-                val = None
-
-                if response.status_code == 200:
-                    try:
-                        val = response.json()['Data']['Value']['userTeam'][0]
-                        val = (
-                            int(val["gdpoints"])
-                            if metric == "Points"
-                            else (val.get(metric_key) or
-                                  val.get("maxTeambal") or
-                                  val.get("team_info", {}).get("maxTeambal"))
-                        )
-                    except Exception:
-                        val = "⚠️⚠️"
-                        val = None
-                race_vals.append(val if val is not None else "–")
-
-            # Points total across all races
-            total = 0
-            for d_all in all_days:
-                url = build_player_team_url(player["uuid"], player["userid"], team["teamno"], d_all)
-                r_all = requests.get(url, headers=headers)
-                if r_all.status_code == 200:
-                    try:
-                        total += int(r_all.json()['Data']['Value']['userTeam'][0]["gdpoints"])
-                    except:
-                        pass
-
-            if metric == "Points" and LL_DELTA is not None and not used_LL:
-                total += LL_DELTA # Adjust for LL delta
-
-            rows.append([team["name"], chips] + race_vals + ([total] if metric == "Points" else []))
-            full_totals.append(total)  
+    summary = None
+    if season is None and standings is None and race_number == get_current_race_number():
+        summary = leaderboard_summary(players, race_number, metric_key, days, LL_DELTA, top, league)
+    if summary is None:
+        if standings is None:
+            standings = get_standings(players, race_number, season=season)
+        summary = standings_summary(standings, race_number, metric_key, days, LL_DELTA)
+    rows, full_totals = summary
 
     rows = [r for _, r in sorted(zip(full_totals, rows), key=lambda x: x[0], reverse=True)] # Sort by total points or budget
+    if top > 0:
+        rows = rows[:top]
+
     cols = ["Team Name", "Chips"] + [location_map.get(d, f"R{d}") for d in days]
     if metric == "Points":
         cols.append("Total Points" if LL_DELTA is None else "Total Points (LL Adj.)")
@@ -262,76 +1174,123 @@ def get_league_summary(players, race_number, metric="Points", LL_DELTA=None, *,
     new_rows = [[row[i] for i in [0, 1] + kept_idx] + [row[-1]] for row in rows]
     new_headers = [cols[i] for i in [0, 1] + kept_idx] + [cols[-1]]
 
-    if top > 0:
-        rows = rows[:top]
+    return new_headers, new_rows, None
 
-    return print_rich_table(new_headers, new_rows)
+def _summary_row(name, chips, race_vals, total, metric_key, LL_DELTA):
+    # LL_DELTA raises the total of teams that haven't used LL
+    if metric_key == "points" and LL_DELTA is not None and "LL" not in chips:
+        total += LL_DELTA # Adjust for LL delta
+    race_vals = [
+        "–" if val is None or np.isnan(val) else int(val) if metric_key == "points" else float(val)
+        for val in race_vals
+    ]
+    return [name, chips] + race_vals + ([total] if metric_key == "points" else []), total
 
-def get_team_compositions(players, race_number):
+def standings_summary(standings, race_number, metric_key, days, LL_DELTA=None):
+    # Unsorted rows and totals
+    season_totals = standings["cumulative"][:, -1] if race_number > 0 else np.zeros(len(standings["teams"]))
+    values = standings[metric_key][:, [d - 1 for d in days]]
+
+    rows, full_totals = [], []
+    for i, (team, season_total) in enumerate(zip(standings["teams"], season_totals)):
+        row, total = _summary_row(team["name"], standings["chips"][i], values[i], int(season_total), metric_key, LL_DELTA)
+        rows.append(row)
+        full_totals.append(total)
+    return rows, full_totals
+
+def leaderboard_summary(players, race_number, metric_key, days, LL_DELTA=None, top=0, league=None):
+    # None when the leaderboard can't be used. With `top`, teams that can't reach it aren't fetched
+    leaderboard = fetch_leaderboard(league=league)
+    if leaderboard is None:
+        return None
+
+    teams = [(player, team) for player in players for team in player["teams"]]
+    entries = [leaderboard.get((player["uuid"], team["teamno"])) or {} for player, team in teams]
+    totals = [entry.get("total") for entry in entries]
+
+    # Teams added to players.json by hand aren't on the leaderboard, their totals still need every matchday
+    missing = [i for i, total in enumerate(totals) if total is None]
+    if missing:
+        extra = load_season_data([_team_player(*teams[i]) for i in missing], race_number)
+        for i, total in zip(missing, np.nansum(season_matrix(extra, "points", range(1, race_number + 1)), axis=1)):
+            totals[i] = int(total)
+
+    shown = list(range(len(teams)))
+    if 0 < top < len(teams):
+        # Totals only grow by the LL adjustment, so anything below the N-th total by more than that is out
+        threshold = sorted(totals, reverse=True)[top - 1]
+        slack = max(LL_DELTA, 0) if metric_key == "points" and LL_DELTA is not None else 0
+        shown = [i for i in shown if totals[i] + slack >= threshold]
+    # Rows go out in leaderboard order, so the sort by total keeps the official tie-break between level teams
+    shown.sort(key=lambda i: entries[i].get("rank", float("inf")))
+
+    fetch_days = sorted(set(days) | {race_number})
+    season = load_season_data([_team_player(*teams[i]) for i in shown], race_number, days=fetch_days)
+
+    rows, full_totals = [], []
+    for i, entry in zip(shown, season):
+        latest = entry["races"].get(race_number)
+        chips = parse_chips(latest["chips"], race_number, cumulative=True) if latest else "–"
+        race_vals = [(entry["races"][d] or {}).get(metric_key) for d in days]
+        row, total = _summary_row(entry["name"], chips, race_vals, totals[i], metric_key, LL_DELTA)
+        rows.append(row)
+        full_totals.append(total)
+    return rows, full_totals
+
+def _team_player(player, team):
+    # A players.json entry holding just this team
+    return {"uuid": player["uuid"], "userid": player["userid"], "teams": [team]}
+
+def get_team_compositions(players, race_number, season=None):
+    return print_rich_table(*team_composition_rows(players, race_number, season=season))
+
+def team_composition_rows(players, race_number, season=None):
+    # (headers, rows, title) without printing
     player_id_map = build_player_id_map(race_number)
+    if season is None:
+        season = load_season_data(players, race_number, days=[race_number])
     table_headers = ["Team Name", "Chips", "Driver 1", "Driver 2", "Driver 3", "Driver 4", "Driver 5", "Constructor 1", "Constructor 2"]
 
     rows = []
-    for player in players:
-        for team in player["teams"]:
-            url = build_player_team_url(player["uuid"], player["userid"], team["teamno"], matchday=race_number)
-            response = requests.get(url, headers=headers)
-
-            if response.status_code != 200:
-                row = [team["name"]] + ["❌"] * 7
+    for team in season:
+        day = team["races"].get(race_number)
+        if day is None:
+            rows.append([team["name"]] + ["❌"] * (len(table_headers) - 1))
+            continue
+
+        chip_info = parse_chips(day["chips"], race_number)
+        drivers = []
+        constructors = []
+
+        for entry in sorted(day["lineup"], key=lambda x: x["playerpostion"]):
+            player_id = entry["id"]
+            name = player_id_map.get(player_id, f"Unknown ({player_id})")
+            if entry["iscaptain"]:
+                name += " (2x)"
+            if entry["ismgcaptain"]:
+                name += " (3x)"
+            pos = entry["playerpostion"]
+
+            if pos in range(1, 6):
+                drivers.append(name)
             else:
-                try:
-                    data = response.json()
-                    team_data = data["Data"]["Value"]["userTeam"][0]
-
-                    chip_info = parse_chips(team_data, race_number)
-                    player_ids = team_data["playerid"]
-
-                    drivers = []
-                    constructors = []
-
-                    for entry in sorted(player_ids, key=lambda x: x["playerpostion"]):
-                        player_id = int(entry["id"])
-                        name = player_id_map.get(player_id, f"Unknown ({player_id})")
-                        if entry.get("iscaptain", 0):
-                            name += " (2x)"
-                        if entry.get("ismgcaptain", 0):
-                            name += " (3x)"
-                        pos = entry["playerpostion"]
-
-                        if pos in range(1, 6):
-                            drivers.append(name)
-                        else:
-                            constructors.append(name)
-
-                    # Pad if incomplete data
-                    while len(drivers) < 5:
-                        drivers.append("⚠️")
-                    while len(constructors) < 2:
-                        constructors.append("⚠️")
-
-                    row = [team["name"], chip_info] + drivers[:5] + constructors[:2]
-
-                except Exception as e:
-                    print(f"Error parsing team for {team['name']}: {e}")
-                    row = [team["name"]] + ["⚠️"] * 7
-            rows.append(row)
+                constructors.append(name)
+
+        # Pad if incomplete data
+        while len(drivers) < 5:
+            drivers.append("⚠️")
+        while len(constructors) < 2:
+            constructors.append("⚠️")
+
+        rows.append([team["name"], chip_info] + drivers[:5] + constructors[:2])
 
     race_location = extract_race_locations().get(race_number, f"Race {race_number}")
-    return print_rich_table(table_headers, rows, title=f"Team Compositions for {race_location}")
+    return table_headers, rows, f"Team Compositions for {race_location}"
 
 def parse_chips(team_data, race_number, cumulative=False):
     chips = []
-    chip_mapping = {
-        "limitlesstakengd": "LL",
-        "is_wildcard_taken_gd_id": "WC",
-        "finalfixtakengd": "FF",
-        "nonigativetakengd": "NN",
-        "extradrstakengd": "3x",
-        "autopilottakengd": "AP"
-    }
 
-    for key, abbr in chip_mapping.items():
+    for key, abbr in CHIP_MAPPING.items():
         value = team_data.get(key)
         
         if isinstance(value, (int, float, str)) and str(value).isdigit():
@@ -344,292 +1303,236 @@ def parse_chips(team_data, race_number, cumulative=False):
 
     return ", ".join([abbr for _, abbr in chips]) if chips else "–"
 
-def season_summary(players, race_number, include_all_teams=False, show_plot=True):
-    location_map = extract_race_locations()
-    race_days = range(1, race_number + 1)
-    team_points = {}
-
-    for player in players:
-        for team in player["teams"]:
-            if not include_all_teams and team["teamno"] != 1:
-                continue  # Skip T2 and T3s unless including all teams
-
-            team_name = team["name"]
-            team_points[team_name] = []
-            cumulative = 0
-
-            for r in race_days:
-                url = build_player_team_url(player["uuid"], player["userid"], team["teamno"], matchday=r)
-                response = requests.get(url, headers=headers)
-
-                if response.status_code != 200:
-                    team_points[team_name].append(cumulative)
-                    continue
-
-                try:
-                    data = response.json()
-                    value = data['Data']['Value']['userTeam'][0].get("gdpoints", 0)
-                    if isinstance(value, (int, float)):
-                        cumulative += value
-                    team_points[team_name].append(cumulative)
-                except:
-                    team_points[team_name].append(cumulative)
-
-    fig = plt.figure(figsize=(24, 8))
-    for team_name, points in team_points.items():
-        line, = plt.plot(race_days, points, marker='o', linewidth=2, label=team_name)
-        for i, score in enumerate(points):
-            y_offset = -10 if i % 2 == 0 else 10
-            plt.annotate(
-                f"{int(score)}",
-                (race_days[i], score),
-                color=line.get_color(),
-                fontsize=8,
-                textcoords="offset points",
-                clip_on=False,
-                xytext=(0, y_offset),
-                ha='center',
-                bbox=dict(boxstyle="round,pad=0.2", fc="white", ec="none", alpha=0.7)
-            )
+def new_figure(figsize, window_title, show_plot, fast=False):
+    # Only interactive figures go through pyplot, so the rest can be built in worker threads
+    dpi = FAST_CHART_DPI if fast else CHART_DPI
+    if show_plot:
+        import matplotlib.pyplot as plt
+        fig = plt.figure(figsize=figsize, dpi=dpi)
+        fig.canvas.manager.set_window_title(window_title)
+    else:
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=figsize, dpi=dpi)
+    return fig, fig.subplots()
+
+def finish_figure(fig, show_plot):
+    fig.tight_layout()
+    if show_plot:
+        import matplotlib.pyplot as plt
+        plt.show()
+    return fig
 
-    plt.xlabel("Circuit")
-    plt.ylabel("Cumulative Points")
-    plt.title("Cumulative Points per Race")
-    plt.gcf().canvas.manager.set_window_title("Cumulative Fantasy Points")
-    plt.grid(True, linestyle='--', alpha=0.6)
-    plt.xticks(race_days, [location_map.get(r, f"Race {r}") for r in race_days], rotation=45, ha='right')
-    plt.legend(title="Teams", loc="upper left")
-    plt.tight_layout()
-    plt.show() if show_plot else plt.close()
+def use_fast_render(fast, team_count):
+    # Auto-select fast rendering for large leagues unless explicitly set
+    return team_count > FAST_CHART_TEAMS if fast is None else fast
 
-    return fig
+_race_axes = {}
 
-def cumulative_gap_from_leader(players, race_number, include_all_teams=False, show_plot=True):
+def race_axis(race_number):
+    # Reused while the schedule is unchanged
     location_map = extract_race_locations()
+    cached = _race_axes.get(race_number)
+    if cached is None or cached[0] is not location_map:
+        races = list(range(1, race_number + 1))
+        cached = (location_map, races, [location_map.get(r, f"Race {r}") for r in races])
+        _race_axes[race_number] = cached
+    return cached[1], cached[2]
+
+def set_race_axis(ax, race_number):
+    races, labels = race_axis(race_number)
+    ax.set_xlabel("Circuit")
+    ax.set_xticks(races, labels, rotation=45, ha='right')
+
+def annotate_series(ax, series, label, fast=False, label_px=28):
+    # Fast mode labels only last points and changes, dropping overlapping labels
+    candidates = []
+    for xs, values, color in series:
+        last = len(values) - 1
+        for i, (x, value) in enumerate(zip(xs, values)):
+            text = label(value)
+            if text is None:
+                continue
+            if fast and 0 < i < last and values[i] == values[i - 1]:
+                continue
+            candidates.append(((i != last, -x), i, x, value, text, color))
+
+    if fast and candidates:
+        lo = min(c[3] for c in candidates)
+        span = (max(c[3] for c in candidates) - lo) or 1
+        rows = max(1, int(ax.figure.get_figheight() * ax.figure.dpi * 0.8 / label_px))
+        occupied = set()
+        kept = []
+        for candidate in sorted(candidates, key=lambda c: c[0]):
+            cell = (candidate[2], int((candidate[3] - lo) / span * rows))
+            if cell not in occupied:
+                occupied.add(cell)
+                kept.append(candidate)
+        candidates = kept
+
+    for _, i, x, value, text, color in candidates:
+        y_offset = -10 if i % 2 == 0 else 10
+        ax.annotate(
+            text,
+            (x, value),
+            color=color,
+            fontsize=8,
+            textcoords="offset points",
+            xytext=(0, y_offset),
+            clip_on=False,
+            ha='center',
+            bbox=dict(boxstyle="round,pad=0.2", fc="white", ec="none", alpha=0.7)
+        )
+
+def season_summary(players, race_number, include_all_teams=False, show_plot=True, season=None, fast=None, standings=None):
+    race_days = range(1, race_number + 1)
+    if standings is None:
+        standings = get_standings(players, race_number, season=season)
+
+    selected = select_standings(standings, include_all_teams)
+    teams = [standings["teams"][i] for i in selected]
+    cumulative = standings["cumulative"][selected]
+    fast = use_fast_render(fast, len(teams))
+
+    fig, ax = new_figure((24, 8), "Cumulative Fantasy Points", show_plot, fast)
+    series = []
+    for team, points in zip(teams, cumulative):
+        line, = ax.plot(race_days, points, marker='o', linewidth=2, label=team["name"])
+        series.append((race_days, points, line.get_color()))
+    annotate_series(ax, series, lambda score: f"{int(score)}", fast)
+
+    set_race_axis(ax, race_number)
+    ax.set_ylabel("Cumulative Points")
+    ax.set_title("Cumulative Points per Race")
+    ax.grid(True, linestyle='--', alpha=0.6)
+    ax.legend(title="Teams", loc="upper left")
+
+    return finish_figure(fig, show_plot)
+
+def cumulative_gap_from_leader(players, race_number, include_all_teams=False, show_plot=True, season=None, fast=None, standings=None):
     RACE_DAYS = range(1, race_number + 1)
-    team_totals = {}
+    if standings is None:
+        standings = get_standings(players, race_number, season=season)
 
-    for player in players:
-        for team in player["teams"]:
-            if not include_all_teams and team["teamno"] != 1:
-                continue  # Skip T2 and T3s unless including all teams
-
-            team_name = team["name"]
-            cumulative_points = []
-            total = 0
-
-            for r in RACE_DAYS:
-                url = build_player_team_url(player["uuid"], player["userid"], team["teamno"], matchday=r)
-                response = requests.get(url, headers=headers)
-                if response.status_code != 200:
-                    cumulative_points.append(total)
-                    continue
-                try:
-                    data = response.json()
-                    pts = data["Data"]["Value"]["userTeam"][0].get("gdpoints", 0)
-                    total += pts
-                    cumulative_points.append(total)
-                except:
-                    cumulative_points.append(total)
-
-            team_totals[team_name] = cumulative_points
-
-    # Normalize by subtracting the leader each round
-    races = list(RACE_DAYS)
-    all_teams = list(team_totals.keys())
-    leader_per_race = [max(team_totals[team][i] for team in all_teams) for i in range(race_number)]
-
-    fig = plt.figure(figsize=(15, 9))
-    for team, points in team_totals.items():
-        gaps = [int(points[i] - leader_per_race[i]) for i in range(race_number)]
-        line, = plt.plot(races, gaps, marker='o', linewidth=2, label=team)
-        
-        for i, gap in enumerate(gaps):
-            if gap != 0:
-                y_offset = -10 if i % 2 == 0 else 10
-                plt.annotate(
-                    f"{gap}",
-                    (races[i], gap),
-                    color=line.get_color(),
-                    fontsize=8,
-                    textcoords="offset points",
-                    xytext=(0, y_offset),
-                    clip_on=False,
-                    ha='center',
-                    bbox=dict(boxstyle="round,pad=0.2", fc="white", ec="none", alpha=0.7)
-                )
-
-    plt.axhline(0, color="gray", linestyle="--", linewidth=1)
-    plt.title("Cumulative Point Gap from Race Leader")
-    plt.gcf().canvas.manager.set_window_title("Points Gap from Leader")
-    plt.xlabel("Circuit")
-    plt.ylabel("Points Behind Leader")
-    plt.xticks(races, [location_map.get(r, f"Race {r}") for r in races], rotation=45, ha='right')
-    plt.legend(title="Teams")
-    plt.grid(True, linestyle="--", alpha=0.7)
-    plt.tight_layout()
-    plt.show() if show_plot else plt.close()
+    selected = select_standings(standings, include_all_teams)
+    teams = [standings["teams"][i] for i in selected]
+    fast = use_fast_render(fast, len(teams))
 
-    return fig
-
-def cumulative_gap_from_leader_budget(players, race_number, include_all_teams=False, show_plot=True):
-    location_map = extract_race_locations()
+    # Normalize by subtracting the leader each round, the leader among the teams shown
+    races = list(RACE_DAYS)
+    team_gaps = standings["gap"] if include_all_teams else gap_from_leader(standings["cumulative"][selected])
+
+    fig, ax = new_figure((15, 9), "Points Gap from Leader", show_plot, fast)
+    series = []
+    for team, team_gap in zip(teams, team_gaps):
+        gaps = [int(gap) for gap in team_gap]
+        line, = ax.plot(races, gaps, marker='o', linewidth=2, label=team["name"])
+        series.append((races, gaps, line.get_color()))
+    annotate_series(ax, series, lambda gap: f"{gap}" if gap != 0 else None, fast)
+
+    ax.axhline(0, color="gray", linestyle="--", linewidth=1)
+    ax.set_title("Cumulative Point Gap from Race Leader")
+    set_race_axis(ax, race_number)
+    ax.set_ylabel("Points Behind Leader")
+    ax.legend(title="Teams")
+    ax.grid(True, linestyle="--", alpha=0.7)
+
+    return finish_figure(fig, show_plot)
+
+def cumulative_gap_from_leader_budget(players, race_number, include_all_teams=False, show_plot=True, season=None, fast=None, standings=None):
     RACE_DAYS = range(1, race_number + 1)
-    team_budgets = {}
-
-    for player in players:
-        for team in player["teams"]:
-            if not include_all_teams and team["teamno"] != 1:
-                continue
+    if standings is None:
+        standings = get_standings(players, race_number, season=season)
 
-            team_name = team["name"]
-            budgets = []
-            for r in RACE_DAYS:
-                url = build_player_team_url(player["uuid"], player["userid"], team["teamno"], matchday=r)
-                response = requests.get(url, headers=headers)
-                if response.status_code != 200:
-                    budgets.append(0 if not budgets else budgets[-1])
-                    continue
-                try:
-                    data = response.json()
-                    val = (
-                        data["Data"]["Value"]["userTeam"][0].get("maxteambal") or
-                        data["Data"]["Value"]["userTeam"][0].get("team_info", {}).get("maxTeambal") or
-                        0
-                    )
-                    budgets.append(float(val))
-                except Exception:
-                    budgets.append(0 if not budgets else budgets[-1])
-            team_budgets[team_name] = budgets
+    selected = select_standings(standings, include_all_teams)
+    teams = [standings["teams"][i] for i in selected]
+    fast = use_fast_render(fast, len(teams))
 
     # Compute budget gap to leader for each race
-    all_teams = list(team_budgets.keys())
-    budget_leader = [max([team_budgets[team][i] for team in all_teams]) for i in range(race_number)]
+    if include_all_teams:
+        team_gaps = standings["budget_gap"]
+    else:
+        team_gaps = gap_from_leader(forward_fill(standings["budget"][selected])).round(2)
 
-    fig = plt.figure(figsize=(15, 9))
+    fig, ax = new_figure((15, 9), "Budget Gap from Leader", show_plot, fast)
     races = list(RACE_DAYS)
-    for team, budgets in team_budgets.items():
-        gaps = [round(budgets[i] - budget_leader[i], 2) for i in range(race_number)]
-        line, = plt.plot(races, gaps, marker='o', linewidth=2, label=team)
-        for i, gap in enumerate(gaps):
-            if gap != 0:
-                y_offset = -10 if i % 2 == 0 else 10
-                plt.annotate(
-                    f"{gap}",
-                    (races[i], gap),
-                    color=line.get_color(),
-                    fontsize=8,
-                    textcoords="offset points",
-                    xytext=(0, y_offset),
-                    clip_on=False,
-                    ha='center',
-                    bbox=dict(boxstyle="round,pad=0.2", fc="white", ec="none", alpha=0.7)
-                )
-    plt.axhline(0, color="gray", linestyle="--", linewidth=1)
-    plt.title("Budget Gap from Leader per Race")
-    plt.gcf().canvas.manager.set_window_title("Budget Gap from Leader")
-    plt.xlabel("Circuit")
-    plt.ylabel("Budget Behind Leader (Million)")
-    plt.xticks(races, [location_map.get(r, f"Race {r}") for r in races], rotation=45, ha='right')
-    plt.legend(title="Teams")
-    plt.grid(True, linestyle="--", alpha=0.7)
-    plt.tight_layout()
-    plt.show() if show_plot else plt.close()
-
-    return fig
-
-def budget_performance_by_race(players, race_number, show_plot=True):
-    location_map = extract_race_locations()
+    series = []
+    for team, team_gap in zip(teams, team_gaps):
+        gaps = [float(gap) for gap in team_gap]
+        line, = ax.plot(races, gaps, marker='o', linewidth=2, label=team["name"])
+        series.append((races, gaps, line.get_color()))
+    annotate_series(ax, series, lambda gap: f"{gap}" if gap != 0 else None, fast)
+
+    ax.axhline(0, color="gray", linestyle="--", linewidth=1)
+    ax.set_title("Budget Gap from Leader per Race")
+    set_race_axis(ax, race_number)
+    ax.set_ylabel("Budget Behind Leader (Million)")
+    ax.legend(title="Teams")
+    ax.grid(True, linestyle="--", alpha=0.7)
+
+    return finish_figure(fig, show_plot)
+
+def budget_performance_by_race(players, race_number, show_plot=True, season=None, fast=None):
     RACE_DAYS = list(range(1, race_number + 1))
-    team_deltas = {}
+    if season is None:
+        season = load_season_data(players, race_number)
 
-    for player in players:
-        for team in player["teams"]:
-            team_name = team["name"]
-            vals = []
-
-            for r in RACE_DAYS:
-                url = build_player_team_url(player["uuid"], player["userid"], team["teamno"], matchday=r)
-                response = requests.get(url, headers=headers)
-
-                if response.status_code != 200:
-                    vals.append(0 if not vals else vals[-1])
-                    continue
-
-                try:
-                    data = response.json()
-                    val = float(
-                        data["Data"]["Value"]["userTeam"][0].get("maxteambal")
-                        or data["Data"]["Value"]["userTeam"][0].get("team_info", {}).get("maxTeambal")
-                        or 0
-                    )
-                    vals.append(val)
-
-                except Exception:
-                    vals.append(0 if not vals else vals[-1])
-            vals = [v - 100 for v in vals]  # Normalize from 100 (starting budget)
-            deltas = [vals[0]] + [vals[i] - vals[i-1] for i in range(1, len(vals))]
-            team_deltas[team_name] = (deltas, team["teamno"])
-
-    fig = plt.figure(figsize=(24, 8))
-    races = list(RACE_DAYS)
+    fast = use_fast_render(fast, len(season))
+    vals = forward_fill(season_matrix(season, "budget", RACE_DAYS)) - 100  # Normalize from 100 (starting budget)
+    deltas = race_deltas(vals)
+    team_deltas = {team["name"]: ([float(d) for d in deltas[i]], team["teamno"]) for i, team in enumerate(season)}
+
+    fig, ax = new_figure((24, 8), "Budget Performance Over Season", show_plot, fast)
+    series = []
     for team, (deltas, _) in team_deltas.items():
         x = list(range(1, len(deltas) + 1))
-        plt.plot(x, deltas, marker='o', linewidth=2, label=team)
-        for i, delta in enumerate(deltas):
-            if abs(delta) > 0:
-                y_offset = -10 if i % 2 == 0 else 10
-                plt.annotate(
-                    f"{delta:+.1f}",
-                    (x[i], deltas[i]),
-                    fontsize=8,
-                    color="black",
-                    textcoords="offset points",
-                    xytext=(0, y_offset),
-                    ha='center',
-                    bbox=dict(boxstyle="round,pad=0.2", fc="white", ec="none", alpha=0.7)
-                )
+        ax.plot(x, deltas, marker='o', linewidth=2, label=team)
+        series.append((x, deltas, "black"))
+    annotate_series(ax, series, lambda delta: f"{delta:+.1f}" if abs(delta) > 0 else None, fast)
 
-    plt.title(f"Race-by-Race Budget Performance Delta per Team")
-    plt.xlabel("Circuit")
-    plt.ylabel(f"Change in Budget")
-    plt.xticks(races, [location_map.get(r, f"Race {r}") for r in races], rotation=45, ha='right')
-    plt.legend(title="Teams")
-    plt.grid(True, linestyle="--", alpha=0.6)
-    plt.tight_layout()
-    plt.gcf().canvas.manager.set_window_title(f"Budget Performance Over Season")
-    plt.show() if show_plot else plt.close()
+    ax.set_title(f"Race-by-Race Budget Performance Delta per Team")
+    set_race_axis(ax, race_number)
+    ax.set_ylabel(f"Change in Budget")
+    ax.legend(title="Teams")
+    ax.grid(True, linestyle="--", alpha=0.6)
 
-    return fig
+    return finish_figure(fig, show_plot)
     
 # ================================
 
 def fetch_f1_data(race_number):
-    FANTASY_API_URL = f"https://fantasy.formula1.com/feeds/drivers/{race_number}_en.json"
+    FANTASY_API_URL = f"{F1_FANTASY_URL}/feeds/drivers/{race_number}_en.json"
 
-    response = requests.get(FANTASY_API_URL)
-    if response.status_code == 200:
-        return response.json()['Data']['Value']
-    else:
+    try:
+        return fetch_feed(FANTASY_API_URL)['Data']['Value']
+    except requests.RequestException:
         raise Exception("Failed to fetch data from Fantasy F1 API")
 
-    # return fetch_with_cache(FANTASY_API_URL, headers=headers)['Data']['Value']
+_asset_catalogs = {}
 
-def get_driver_stats(race_number):
+def get_asset_catalog(race_number):
+    # One pass over the drivers feed, memoized while the feed is unchanged
     data = fetch_f1_data(race_number)
-    drivers = []
-    entity_map = {}
+    cached = _asset_catalogs.get(race_number)
+    if cached is not None and cached[0] is data:
+        return cached[1]
+
+    drivers, constructors = [], []
+    driver_map, constructor_map = {}, {}
 
     for item in data:
-        if item.get("PositionName") == "DRIVER" and item.get("IsActive") == "1":
-            full_name = item.get("FUllName")
-            player_id = int(item["PlayerId"])
-            entity_map[player_id] = full_name
+        if item.get("IsActive") != "1":
+            continue
 
-            # Ignore None entries when missing data at the start of a race weekend
-            additional_stats = item.get("AdditionalStats") or {}
+        position = item.get("PositionName")
+        full_name = item.get("FUllName")
+        player_id = int(item["PlayerId"])
 
-            stats = {
+        # Ignore None entries when missing data at the start of a race weekend
+        additional_stats = item.get("AdditionalStats") or {}
+
+        if position == "DRIVER":
+            driver_map[player_id] = full_name
+            drivers.append({
                 "Name": full_name,
                 "Team": item.get("TeamName"),
                 "Value (M)": float(item.get("Value", 0)),
@@ -640,46 +1543,47 @@ def get_driver_stats(race_number):
                 "Fastest Lap": int(additional_stats.get("fastest_lap_pts", 0.0)),
                 "DotD": int(additional_stats.get("dotd_pts", 0.0)),
                 "Value for Money": additional_stats.get("value_for_money", 0.0),
-            }
-            drivers.append(stats)
+            })
+        elif position == "CONSTRUCTOR":
+            constructor_map[player_id] = full_name
+            constructors.append({
+                "Name": full_name,
+                "Value (M)": float(item.get("Value", 0)),
+                "Total Points": int(float(item.get("OverallPpints", 0))),
+                "Position Points": int(additional_stats.get("total_position_pts", 0.0)),
+                "DNF/DQ": int(additional_stats.get("total_dnf_dq_pts", 0.0)),
+                "Overtaking": int(additional_stats.get("overtaking_pts", 0.0)),
+                "Fastest Lap": int(additional_stats.get("fastest_lap_pts", 0.0)),
+                "Value for Money": additional_stats.get("value_for_money", 0.0),
+            })
+
+    catalog = {
+        "drivers": drivers,
+        "constructors": constructors,
+        "driver_map": driver_map,
+        "constructor_map": constructor_map,
+        "names": {**driver_map, **constructor_map},
+    }
+    _asset_catalogs[race_number] = (data, catalog)
+    return catalog
 
-    return drivers, entity_map
+def get_driver_stats(race_number):
+    catalog = get_asset_catalog(race_number)
+    return catalog["drivers"], catalog["driver_map"]
 
 def get_current_race_number():
-    RACE_NUMBER_URL = "https://fantasy.formula1.com/feeds/limits/constraints.json"
+    RACE_NUMBER_URL = f"{F1_FANTASY_URL}/feeds/limits/constraints.json"
 
     try:
-        response = requests.get(RACE_NUMBER_URL)
-        matchday_id = response.json()["Data"]["Value"]["GamedayId"]
+        matchday_id = fetch_feed(RACE_NUMBER_URL, ttl=CURRENT_RACE_TTL)["Data"]["Value"]["GamedayId"]
         return matchday_id
     except Exception as e:
         print(f"⚠️ Could not fetch current race number: {e}")
         return None
 
 def get_constructor_stats(race_number):
-    data = fetch_f1_data(race_number)
-    constructors = []
-    entity_map = {}
-
-    for item in data:
-        if item.get("PositionName") == "CONSTRUCTOR" and item.get("IsActive") == "1":
-            name = item.get("FUllName")
-            player_id = int(item["PlayerId"])
-            entity_map[player_id] = name
-
-            stats = {
-                "Name": name,
-                "Value (M)": float(item.get("Value", 0)),
-                "Total Points": int(float(item.get("OverallPpints", 0))),
-                "Position Points": int(item["AdditionalStats"].get("total_position_pts", 0.0)),
-                "DNF/DQ": int(item["AdditionalStats"].get("total_dnf_dq_pts", 0.0)),
-                "Overtaking": int(item["AdditionalStats"].get("overtaking_pts", 0.0)),
-                "Fastest Lap": int(item["AdditionalStats"].get("fastest_lap_pts", 0.0)),
-                "Value for Money": item["AdditionalStats"].get("value_for_money", 0.0),
-            }
-            constructors.append(stats)
-
-    return constructors, entity_map
+    catalog = get_asset_catalog(race_number)
+    return catalog["constructors"], catalog["constructor_map"]
 
 def print_asset_table(assets, title):
     if not assets:
@@ -690,31 +1594,30 @@ def print_asset_table(assets, title):
     rows = [[row[h] for h in table_headers] for row in assets]
     return print_rich_table(table_headers, rows, title=title)
 
-def print_driver_table():
-    drivers, _ = get_driver_stats()
+def print_driver_table(race_number=None):
+    drivers, _ = get_driver_stats(race_number or get_current_race_number())
     drivers = sorted(drivers, key=lambda x: x.get("Value (M)", 0), reverse=True)
     print_asset_table(drivers, title="Driver Stats")
     return drivers
 
-def print_constructor_table():
-    constructors, _ = get_constructor_stats()
+def print_constructor_table(race_number=None):
+    constructors, _ = get_constructor_stats(race_number or get_current_race_number())
     constructors = sorted(constructors, key=lambda x: x.get("Value (M)", 0), reverse=True)
     print_asset_table(constructors, title="Constructor Stats")
     return constructors
 
 def build_player_id_map(race_number):
-    _, driver_map = get_driver_stats(race_number)
-    _, constructor_map = get_constructor_stats(race_number)
-    return {**driver_map, **constructor_map}
+    return get_asset_catalog(race_number)["names"]
 
-def extract_race_locations():
-    F1_SCHEDULE_URL = f"https://fantasy.formula1.com/feeds/schedule/raceday_en.json"
+_race_locations = (None, None)
 
-    response = requests.get(F1_SCHEDULE_URL)
-    response.raise_for_status()
-    data = response.json()
+def extract_race_locations():
+    global _race_locations
+    F1_SCHEDULE_URL = f"{F1_FANTASY_URL}/feeds/schedule/raceday_en.json"
 
-    # data = fetch_with_cache(F1_SCHEDULE_URL, headers=headers)
+    data = fetch_feed(F1_SCHEDULE_URL)
+    if _race_locations[0] is data:
+        return _race_locations[1]
 
     races = data.get("Data", {}).get("Value", [])
     circuit_dict = {}
@@ -729,32 +1632,37 @@ def extract_race_locations():
     # for race_number, location in circuit_dict.items():
     #     print(f"Race {race_number}: {location}")
 
+    _race_locations = (data, circuit_dict)
     return circuit_dict
 
 def print_rich_table(headers, rows, title=None, highlight=True, show_lines=True):
+    from rich.table import Table
     table = Table(title=title, highlight=highlight, show_lines=show_lines)
     for idx, col in enumerate(headers):
         justify = "left" if idx < 2 else "right"
         table.add_column(col, justify=justify)
     for row in rows:
         table.add_row(*map(str, row))
-    console.print(table)
+    get_console().print(table)
 
     return table
 
 # ================================
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="F1 Fantasy league dashboard")
+    parser.add_argument("race_number", nargs="?", type=int, help="Race number to report on (default: current race)")
+    parser.add_argument("--snapshot", help="Run offline from a snapshot written by --export-snapshot")
+    parser.add_argument("--export-snapshot", metavar="PATH", help="Save everything the reports need to PATH and exit")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        load_snapshot(args.snapshot)
+    init()
+
     harvest_f1_cookies()
     players = fetch_league_players()
 
-    if len(sys.argv) > 1:
-        try:
-            RACE_NUMBER = int(sys.argv[1]) # Override race number from console argument
-        except ValueError:
-            print("Error: Race number must be an integer.")
-            sys.exit(1)
-
     # ================================
     # 🎯 Race Configuration
     # ================================
@@ -762,34 +1670,42 @@ if __name__ == "__main__":
     # You can override via:
     #   1. Command-line argument: python f1_fantasy_dashboard.py 16
     #   2. Hardcoding: RACE_NUMBER = 16  # e.g., for Monza
-    RACE_NUMBER = get_current_race_number()
+    RACE_NUMBER = args.race_number or get_current_race_number()
+
+    if args.export_snapshot:
+        sys.exit(0 if export_snapshot(args.export_snapshot, players, RACE_NUMBER) else 1)
 
     # Add a fixed points delta as if every manager had used LL
     LL_DELTA = 128
 
+    # Fetch every team/matchday once, all reports below share it
+    season = load_season_data(players, RACE_NUMBER)
+    standings = get_standings(players, RACE_NUMBER, season=season)
+
     # ================================
     # 📊 Basic League Summaries
     # ================================
-    # get_league_summary(players, RACE_NUMBER)
-    # get_league_summary(players, RACE_NUMBER, "Budget")
+    # get_league_summary(players, RACE_NUMBER, standings=standings)
+    # get_league_summary(players, RACE_NUMBER, "Budget", standings=standings)
     
-    get_league_summary(players, RACE_NUMBER, last=5)
-    get_league_summary(players, RACE_NUMBER, "Budget", last=5)
+    get_league_summary(players, RACE_NUMBER, last=5, standings=standings)
+    get_league_summary(players, RACE_NUMBER, "Budget", last=5, standings=standings)
     
     # ================================
     # 🔍 Advanced Summaries
     # ================================
-    # get_league_summary(players, RACE_NUMBER, LL_DELTA=LL_DELTA)   # LL-adjusted points
-    # season_summary(players, RACE_NUMBER, include_all_teams=True)  # Season progression
-    # cumulative_gap_from_leader(players, RACE_NUMBER)              # Points gap vs leader
-    # cumulative_gap_from_leader_budget(players, RACE_NUMBER)       # Budget gap vs leader
-    # budget_performance_by_race(players, RACE_NUMBER)              # Budget performance by race
+    # get_league_summary(players, RACE_NUMBER, LL_DELTA=LL_DELTA, standings=standings)   # LL-adjusted points
+    # get_league_summary(players, RACE_NUMBER, last=5, top=10)                          # Leaderboard totals, fetches only the top 10's last 5 races
+    # season_summary(players, RACE_NUMBER, include_all_teams=True, standings=standings)  # Season progression
+    # cumulative_gap_from_leader(players, RACE_NUMBER, standings=standings)              # Points gap vs leader
+    # cumulative_gap_from_leader_budget(players, RACE_NUMBER, standings=standings)       # Budget gap vs leader
+    # budget_performance_by_race(players, RACE_NUMBER, season=season)              # Budget performance by race
 
     # ================================
     # 🧑‍🤝‍🧑 Team Lineups
     # ================================
-    # get_team_compositions(players, RACE_NUMBER - 1)  # Previous race
-    # get_team_compositions(players, RACE_NUMBER)      # Current race
+    # get_team_compositions(players, RACE_NUMBER - 1, season=season)  # Previous race
+    # get_team_compositions(players, RACE_NUMBER, season=season)      # Current race
     
     # ================================
     # 📈 Driver/Constructor Asset Stats
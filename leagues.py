@@ -0,0 +1,126 @@
+"""
+Discord guilds mapped to F1 Fantasy leagues, read once from LEAGUES_FILE:
+
+    [
+      {"name": "Main", "league_id": "1234567", "player_uuid": "abcdef12-...", "guilds": [111111111111111111],
+       "max_teams": 200, "requests_per_hour": 2000, "render_cache_bytes": 8388608},
+      {"name": "Work", "league_id": "7654321", "guilds": [222222222222222222, 333333333333333333]}
+    ]
+
+A league without "guilds" serves every guild not listed elsewhere. Without the file, the single league
+from PLAYER_LEAGUE / PLAYER_UUID and the configured players file serves every guild.
+"""
+import os
+import json
+import math
+import time
+import threading
+from collections import deque
+from dotenv import load_dotenv
+import metrics
+
+load_dotenv()
+LEAGUES_FILE = os.getenv("LEAGUES_FILE", "leagues.json")
+LEAGUE_MAX_TEAMS = int(os.getenv("LEAGUE_MAX_TEAMS", "0"))                  # Teams loaded per league, 0 for all
+LEAGUE_REQUESTS_PER_HOUR = int(os.getenv("LEAGUE_REQUESTS_PER_HOUR", "0"))  # API requests per league per hour, 0 for no limit
+
+_leagues = None
+_lock = threading.Lock()
+
+class RequestBudget:
+    """At most `per_hour` requests in any rolling hour, no limit when it's 0."""
+
+    def __init__(self, name, per_hour):
+        self.name = name
+        self.per_hour = per_hour
+        self.sent = deque()
+        self.lock = threading.Lock()
+
+    def _expire(self, now):
+        while self.sent and now - self.sent[0] >= 3600:
+            self.sent.popleft()
+
+    def take(self):
+        if not self.per_hour:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self._expire(now)
+            if len(self.sent) >= self.per_hour:
+                metrics.inc("f1_request_budget_refused_total", league=self.name)
+                return False
+            self.sent.append(now)
+            return True
+
+    def spent(self):
+        if not self.per_hour:
+            return False
+        with self.lock:
+            self._expire(time.monotonic())
+            return len(self.sent) >= self.per_hour
+
+def _with_defaults(league):
+    league = dict(league)
+    league_id = str(league["league_id"]) if league.get("league_id") else None
+    league["league_id"] = league_id
+    league.setdefault("name", league_id or "default")
+    league.setdefault("player_uuid", None)
+    # None keeps the configured players file (PLAYER_FILE), which only the single league should use
+    league.setdefault("players_file", f"players-{league_id}.json" if league_id else None)
+    league["guilds"] = {str(guild) for guild in league["guilds"]} if league.get("guilds") is not None else None
+    league.setdefault("max_teams", LEAGUE_MAX_TEAMS)
+    league.setdefault("requests_per_hour", LEAGUE_REQUESTS_PER_HOUR)
+    league.setdefault("render_cache_bytes", None)
+    league["budget"] = RequestBudget(league["name"], league["requests_per_hour"])
+    return league
+
+def load(path=LEAGUES_FILE):
+    """Every configured league with its defaults filled in."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            configured = json.load(f)
+    except FileNotFoundError:
+        return [_with_defaults({
+            "league_id": os.getenv("PLAYER_LEAGUE"),
+            "player_uuid": os.getenv("PLAYER_UUID"),
+            "players_file": None,
+        })]
+    return [_with_defaults(league) for league in configured]
+
+def get():
+    global _leagues
+    if _leagues is None:
+        with _lock:
+            if _leagues is None:
+                _leagues = load()
+    return _leagues
+
+def for_guild(guild_id):
+    """The league serving `guild_id` (None in DMs): the one listing it, else the first listing no guilds."""
+    guild_id = str(guild_id) if guild_id is not None else None
+    fallback = None
+    for league in get():
+        if league["guilds"] is None:
+            fallback = fallback or league
+        elif guild_id in league["guilds"]:
+            return league
+    return fallback
+
+def by_name(name):
+    return next((league for league in get() if league["name"] == name), None)
+
+def cap_teams(players, max_teams):
+    """
+    The `max_teams` best placed teams of `players`, still grouped by manager. All of them when it's 0.
+    Placing is the leaderboard position stored with each team, file order for files without one.
+    """
+    if not max_teams:
+        return players
+    teams = [team for player in players for team in player["teams"]]
+    kept = {id(team) for team in sorted(teams, key=lambda team: team.get("position", math.inf))[:max_teams]}
+    capped = []
+    for player in players:
+        player_teams = [team for team in player["teams"] if id(team) in kept]
+        if player_teams:
+            capped.append({**player, "teams": player_teams})
+    return capped
@@ -0,0 +1,150 @@
+"""
+In-process counters and timings, exposed in the Prometheus text format.
+
+The bot and the webhook run as separate processes, so each process can flush a snapshot
+into METRICS_DIR and `render()` merges every snapshot it finds there with its own.
+"""
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from dotenv import load_dotenv
+import state
+
+load_dotenv()
+METRICS_DIR = Path(os.getenv("METRICS_DIR", os.path.join(os.getenv("CACHE_DIR", ".cache"), "metrics")))
+
+_lock = threading.Lock()
+_counters = {}
+_timings = {}
+_flushed_as = None  # Role this process flushes under, its own file is already in the live counters
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def inc(name, amount=1, **labels):
+    if not amount:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    with _lock:
+        count, total, slowest = _timings.get(key, (0, 0.0, 0.0))
+        _timings[key] = (count + 1, total + seconds, max(slowest, seconds))
+
+@contextmanager
+def timer(name, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+def snapshot():
+    with _lock:
+        return {
+            "counters": [[name, list(labels), value] for (name, labels), value in _counters.items()],
+            "timings": [[name, list(labels), list(value)] for (name, labels), value in _timings.items()],
+        }
+
+def flush(role):
+    """Write this process' snapshot to METRICS_DIR, atomically so readers never see a partial file."""
+    global _flushed_as
+    _flushed_as = role
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    with state.atomic_write(METRICS_DIR / f"{role}.json") as f:
+        json.dump(snapshot(), f)
+
+def _merge(snapshots):
+    counters, timings = {}, {}
+    for snap in snapshots:
+        for name, labels, value in snap.get("counters", []):
+            key = (name, tuple(tuple(label) for label in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, (count, total, slowest) in snap.get("timings", []):
+            key = (name, tuple(tuple(label) for label in labels))
+            c, t, s = timings.get(key, (0, 0.0, 0.0))
+            timings[key] = (c + count, t + total, max(s, slowest))
+    return counters, timings
+
+def collect(include_flushed=True):
+    snapshots = [snapshot()]
+    if include_flushed and METRICS_DIR.is_dir():
+        for path in sorted(METRICS_DIR.glob("*.json")):
+            if path.stem == _flushed_as:
+                continue
+            try:
+                snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue
+    return _merge(snapshots)
+
+def _format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+def render(include_flushed=True):
+    counters, timings = collect(include_flushed)
+    lines = []
+
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {name} counter")
+        for (n, labels), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for name in sorted({name for name, _ in timings}):
+        lines.append(f"# TYPE {name} summary")
+        for (n, labels), (count, total, _) in sorted(timings.items()):
+            if n == name:
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+        # A summary has no _max sample, the slowest run is its own gauge family
+        lines.append(f"# TYPE {name}_max gauge")
+        for (n, labels), (_, _, slowest) in sorted(timings.items()):
+            if n == name:
+                lines.append(f"{name}_max{_format_labels(labels)} {slowest:.6f}")
+
+    return "\n".join(lines) + "\n"
+
+def summary(include_flushed=True):
+    """Short human-readable digest for chat: request counts, cache hit ratios and command latency."""
+    counters, timings = collect(include_flushed)
+    lines = []
+
+    requests = {}
+    for (name, labels), value in counters.items():
+        if name == "f1_http_requests_total":
+            endpoint = dict(labels).get("endpoint", "?")
+            requests[endpoint] = requests.get(endpoint, 0) + value
+    for endpoint, value in sorted(requests.items(), key=lambda x: -x[1]):
+        lines.append(f"requests {endpoint}: {int(value)}")
+
+    retries = sum(v for (n, _), v in counters.items() if n == "f1_http_retries_total")
+    lines.append(f"retries: {int(retries)}")
+
+    caches = {}
+    for (name, labels), value in counters.items():
+        if name == "f1_cache_requests_total":
+            labels = dict(labels)
+            hits, total = caches.get(labels.get("cache"), (0, 0))
+            caches[labels.get("cache")] = (hits + (value if labels.get("result") == "hit" else 0), total + value)
+    for cache, (hits, total) in sorted(caches.items()):
+        if not total:
+            continue
+        lines.append(f"cache {cache}: {hits / total:.0%} hit ({int(hits)}/{int(total)})")
+
+    for (name, labels), (count, total, slowest) in sorted(timings.items()):
+        if name == "f1_command_stage_seconds":
+            labels = dict(labels)
+            lines.append(f"{labels.get('command')} {labels.get('stage')}: avg {total / count:.2f}s, max {slowest:.2f}s ({count}x)")
+
+    return "\n".join(lines)
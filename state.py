@@ -0,0 +1,168 @@
+"""
+Cookies and league players, loaded once per process and swapped as a whole when they change.
+
+The webhook writes new files atomically and sends a datagram to STATE_NOTIFY_PORT on localhost.
+`watch()` reloads on that notification, and also checks the files every STATE_POLL_INTERVAL seconds
+to pick up manual edits, or a webhook the datagram can't reach.
+"""
+import os
+import json
+import socket
+import tempfile
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+COOKIE_FILE = os.getenv("COOKIE_FILE", "cookie.json")
+PLAYERS_FILE = os.getenv("PLAYER_FILE", "players.json")
+STATE_NOTIFY_PORT = int(os.getenv("STATE_NOTIFY_PORT", "8765"))      # Webhook → bot reload notifications on localhost
+STATE_POLL_INTERVAL = float(os.getenv("STATE_POLL_INTERVAL", "30"))   # Seconds between fallback file checks
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+
+_files = {"cookies": COOKIE_FILE, "players": PLAYERS_FILE}
+_state = None
+_lock = threading.Lock()
+_watcher = None
+
+def build_headers(cookies):
+    return {
+        "User-Agent": USER_AGENT,
+        "Accept": "application/json",
+        "Referer": "https://fantasy.formula1.com",
+        "Origin": "https://fantasy.formula1.com",
+        "Cookie": "; ".join(f"{k}={v}" for k, v in cookies.items()),
+    }
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except FileNotFoundError:
+        return None
+
+def _read_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+def load():
+    # Stamps are taken before reading, so a write racing the read is seen as a change on the next check
+    stamps = {kind: _stamp(path) for kind, path in _files.items()}
+    cookies = _read_json(_files["cookies"], {}).get("Request Cookies", {})
+    return {
+        "cookies": cookies,
+        "headers": build_headers(cookies),
+        "players": _read_json(_files["players"], []),
+        "cookie_file": _files["cookies"],
+        "players_file": _files["players"],
+        "stamps": stamps,
+    }
+
+def get():
+    """The current state. Never mutate it, `reload()` replaces it with a new one."""
+    global _state
+    if _state is None:
+        with _lock:
+            if _state is None:
+                _state = load()
+    return _state
+
+def reload():
+    global _state
+    with _lock:
+        _state = load()
+    return _state
+
+def configure(cookie_file=None, players_file=None):
+    """Point the state at other files. They're read on the next `get()`, not here."""
+    global _state
+    with _lock:
+        if cookie_file:
+            _files["cookies"] = cookie_file
+        if players_file:
+            _files["players"] = players_file
+        _state = None
+
+_other_players = {}  # path → (stamp, players) of other leagues' players files
+
+def read_players(path):
+    """Players from a file other than the configured one, read again only once the file changes."""
+    stamp = _stamp(path)
+    cached = _other_players.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    players = _read_json(path, [])
+    _other_players[path] = (stamp, players)
+    return players
+
+def changed():
+    current = get()
+    return any(_stamp(path) != current["stamps"][kind] for kind, path in _files.items())
+
+@contextmanager
+def atomic_write(path, mode="w"):
+    """Write through a uniquely named temp file next to `path`, renamed into place so readers never see half a file."""
+    path = os.fspath(path)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+def write_json_atomic(path, data):
+    with atomic_write(path) as f:
+        json.dump(data, f, indent=2)
+
+def notify():
+    # Fire and forget, the watcher's periodic file check covers a missed datagram
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b"reload", ("127.0.0.1", STATE_NOTIFY_PORT))
+    except OSError as e:
+        print(f"Could not notify state change: {e}")
+
+def watch(on_reload=None):
+    """Start a daemon thread reloading the state on a notification or a file change. Safe to call more than once."""
+    global _watcher
+    if _watcher is not None:
+        return _watcher
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.bind(("127.0.0.1", STATE_NOTIFY_PORT))
+        sock.settimeout(STATE_POLL_INTERVAL)
+    except OSError as e:
+        print(f"State notifications unavailable ({e}), checking files every {STATE_POLL_INTERVAL:g}s")
+        sock.close()
+        sock = None
+
+    def run():
+        while True:
+            notified = False
+            if sock is not None:
+                try:
+                    sock.recv(64)
+                    notified = True
+                except socket.timeout:
+                    pass
+            else:
+                threading.Event().wait(STATE_POLL_INTERVAL)
+
+            if notified or changed():
+                current = reload()
+                if on_reload:
+                    on_reload(current)
+
+    _watcher = threading.Thread(target=run, name="state-watcher", daemon=True)
+    _watcher.start()
+    return _watcher
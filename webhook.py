@@ -1,5 +1,8 @@
-from flask import Flask, request, jsonify
-import json, os
+from flask import Flask, Response, request, jsonify
+import os
+import state
+import leagues
+import metrics
 
 app = Flask(__name__)
 COOKIE_FILE = os.getenv("COOKIE_PATH", "cookie.json")
@@ -11,8 +14,8 @@ def cookies():
         data = request.get_json(force=True)
         # print("Received JSON data:", data)
         
-        with open(COOKIE_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        state.write_json_atomic(COOKIE_FILE, data)
+        state.notify()
 
         return jsonify({"status": "success"}), 200
     except Exception as e:
@@ -24,13 +27,22 @@ def cookies():
 def players():
     try:
         data = request.get_json(force=True)
-        with open(PLAYERS_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        # ?league=<name> updates that league's players file, configured in leagues.json
+        league = leagues.by_name(request.args["league"]) if "league" in request.args else None
+        if "league" in request.args and league is None:
+            return jsonify({"status": "error", "message": f"Unknown league {request.args['league']}"}), 404
+        state.write_json_atomic((league and league["players_file"]) or PLAYERS_FILE, data)
+        state.notify()
         return jsonify({"status": "success"}), 200
     except Exception as e:
         print("Error processing JSON:", e)
         print(f"Raw payload: {request.data}")
         return jsonify({"status": "error", "message": str(e)}), 400
     
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    # Counters flushed by the bot (and any other process sharing METRICS_DIR), in the Prometheus text format
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8080)
\ No newline at end of file